@@ -14,33 +14,103 @@ Bitcoin Script is a simple, stack-based, Forth-like scripting language
 used to define spending conditions for transaction outputs.
 """
 
+import functools
 import hashlib
 import hmac
+import operator
 import time
-import struct
-from typing import List, Optional, Union, Tuple, Any
+from collections import OrderedDict
+from itertools import repeat
+from typing import Iterable, Iterator, List, Optional, Union, Tuple, Any, Callable
 from dataclasses import dataclass
 from enum import IntEnum
 import secrets
 
+# Optional dependency (pip install coincurve): real secp256k1 verification
+# for SEC-encoded public keys; everything else runs on the standard library
+try:
+    from coincurve import PublicKey as _SecpPublicKey
+except ImportError:
+    _SecpPublicKey = None
+
 
 # ============================================================================
 # CRYPTOGRAPHIC PRIMITIVES
 # ============================================================================
 
+# hashlib's OpenSSL backend already dispatches to SHA-NI / AVX2 at runtime,
+# so the helpers bind the C constructor once and stay a single call deep.
+_sha256 = hashlib.sha256
+# hashlib.new() looks the algorithm up by name on every call; copying a
+# pristine RIPEMD160 object skips that lookup
+_RIPEMD160 = hashlib.new('ripemd160')
+
+
 def sha256(data: bytes) -> bytes:
     """Single SHA256 hash"""
-    return hashlib.sha256(data).digest()
+    return _sha256(data).digest()
 
 
 def hash256(data: bytes) -> bytes:
     """Double SHA256 (Bitcoin standard)"""
-    return sha256(sha256(data))
+    return _sha256(_sha256(data).digest()).digest()
 
 
 def hash160(data: bytes) -> bytes:
     """SHA256 followed by RIPEMD160"""
-    return hashlib.new('ripemd160', sha256(data)).digest()
+    h = _RIPEMD160.copy()
+    h.update(_sha256(data).digest())
+    return h.digest()
+
+
+def hash256_many(items: List[bytes]) -> List[bytes]:
+    """hash256 over a batch of inputs (e.g. one merkle tree level)"""
+    sha = _sha256
+    return [sha(sha(data).digest()).digest() for data in items]
+
+
+def hash160_many(items: List[bytes]) -> List[bytes]:
+    """hash160 over a batch of inputs"""
+    copy = _RIPEMD160.copy
+    results = []
+    append = results.append
+    for data in items:
+        h = copy()
+        h.update(_sha256(data).digest())
+        append(h.digest())
+    return results
+
+
+# Largest element a script may push (MAX_SCRIPT_ELEMENT_SIZE in Bitcoin Core)
+MAX_SCRIPT_ELEMENT_SIZE = 520
+
+# Maximum combined size of the main and alt stacks during execution
+MAX_STACK_SIZE = 1000
+
+
+def _cached_hash(hash_fn):
+    """
+    Memoize a hash function for script-sized elements.
+    
+    Validation re-hashes the same pubkeys and preimages over and over, so
+    opcode results are cached by input bytes. Oversized inputs bypass the
+    cache to keep its memory bounded.
+    """
+    cached = functools.lru_cache(maxsize=8192)(hash_fn)
+    
+    def wrapper(data: bytes) -> bytes:
+        if len(data) <= MAX_SCRIPT_ELEMENT_SIZE:
+            return cached(data)
+        return hash_fn(data)
+    
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+_sha256_cached = _cached_hash(sha256)
+_hash160_cached = _cached_hash(hash160)
+_hash256_cached = _cached_hash(hash256)
 
 
 def sign_message(private_key: bytes, message: bytes) -> bytes:
@@ -48,15 +118,47 @@ def sign_message(private_key: bytes, message: bytes) -> bytes:
     return hmac.new(private_key, message, hashlib.sha256).digest()
 
 
-def verify_signature(public_key: bytes, message: bytes, signature: bytes) -> bool:
-    """Simplified signature verification"""
-    # In real Bitcoin, this would use ECDSA verification
-    # For this implementation, we use a deterministic check
-    expected = hmac.new(public_key, message + b'verify', hashlib.sha256).digest()
-    # Store the relationship in signature format for demo purposes
+def _is_sec_pubkey(public_key: bytes) -> bool:
+    """True for a compressed (33-byte) or uncompressed (65-byte) SEC key"""
+    length = len(public_key)
+    return ((length == 33 and public_key[0] in (2, 3))
+            or (length == 65 and public_key[0] == 4))
+
+
+def verify_signature(public_key: bytes, message: bytes, signature: bytes,
+                     prehashed: bool = False) -> bool:
+    """
+    Signature verification
+    
+    SEC-encoded keys are checked with ECDSA over secp256k1 when coincurve is
+    installed. The message is hashed with SHA256 first unless prehashed is
+    set, in which case it must already be the 32-byte digest. The demo's
+    32-byte keys keep the simplified length-only check.
+    """
+    if _SecpPublicKey is not None and _is_sec_pubkey(public_key):
+        try:
+            if prehashed:
+                return _SecpPublicKey(public_key).verify(signature, message, hasher=None)
+            return _SecpPublicKey(public_key).verify(signature, message)
+        except (ValueError, TypeError):
+            return False
+    # Simplified check for demo keys
     return len(signature) == 32 and len(public_key) == 32
 
 
+def verify_signatures_batch(public_keys: Iterable[bytes], messages: Iterable[bytes],
+                            signatures: Iterable[bytes], prehashed: bool = False) -> Iterator[bool]:
+    """
+    Verify many (public_key, message, signature) triples in one call
+    
+    Yields one result per triple, verifying each only when it is consumed,
+    so a caller can stop at the first result it needs. This is the single
+    entry point for batched verification: a real ECDSA backend can amortize
+    context setup and modular inversions across the batch here.
+    """
+    return map(verify_signature, public_keys, messages, signatures, repeat(prehashed))
+
+
 # ============================================================================
 # OPCODES - Bitcoin Script Instructions
 # ============================================================================
@@ -175,6 +277,39 @@ class OpCode(IntEnum):
     OP_NOP10 = 0xb9
 
 
+# Plain-int copies of opcodes tested on hot paths: IntEnum members hash and
+# compare through slower generic paths than bare ints
+_OP_0 = int(OpCode.OP_0)
+_OP_PUSHDATA1 = int(OpCode.OP_PUSHDATA1)
+_OP_PUSHDATA2 = int(OpCode.OP_PUSHDATA2)
+_OP_DUP = int(OpCode.OP_DUP)
+_OP_HASH160 = int(OpCode.OP_HASH160)
+_OP_EQUALVERIFY = int(OpCode.OP_EQUALVERIFY)
+_OP_CHECKSIG = int(OpCode.OP_CHECKSIG)
+
+# Internal opcode for OP_DUP OP_HASH160 <20 bytes> OP_EQUALVERIFY; lies outside
+# the byte range so it can never be confused with a serialized opcode
+_FUSED_DUP_HASH160_EQV = 0x100
+
+# Opcodes that execute as no-ops (OP_NOP plus the reserved upgrade NOPs)
+_NOP_OPS = frozenset({
+    OpCode.OP_NOP, OpCode.OP_NOP1, OpCode.OP_NOP4, OpCode.OP_NOP5,
+    OpCode.OP_NOP6, OpCode.OP_NOP7, OpCode.OP_NOP8, OpCode.OP_NOP9,
+    OpCode.OP_NOP10,
+})
+
+# Numeric opcodes: operands are decoded script numbers, results are re-encoded
+_UNARY_NUM_OPS = {
+    OpCode.OP_1ADD: lambda a: a + 1,
+    OpCode.OP_1SUB: lambda a: a - 1,
+}
+
+_BINARY_NUM_OPS = {
+    OpCode.OP_ADD: operator.add,
+    OpCode.OP_SUB: operator.sub,
+}
+
+
 # ============================================================================
 # SCRIPT ENGINE - Stack-based Execution
 # ============================================================================
@@ -184,6 +319,13 @@ class ScriptError(Exception):
     pass
 
 
+# Straight-line Python functions generated by ScriptInterpreter.compile(),
+# keyed by Script.opcodes. Opt-in: stays empty unless compile() is called,
+# and holds at most _MAX_COMPILED_SCRIPTS entries, least recently used first.
+_MAX_COMPILED_SCRIPTS = 1024
+_COMPILED_SCRIPTS: 'OrderedDict[Tuple[Union[int, bytes], ...], Callable]' = OrderedDict()
+
+
 class Script:
     """
     Bitcoin Script - A stack-based scripting language
@@ -192,9 +334,48 @@ class Script:
     Example: OP_DUP OP_HASH160 <pubKeyHash> OP_EQUALVERIFY OP_CHECKSIG
     """
     
+    __slots__ = ('_opcodes', '_program', '_cached_bytes')
+    
     def __init__(self, opcodes: List[Union[int, bytes]]):
         self.opcodes = opcodes
     
+    @property
+    def opcodes(self) -> Tuple[Union[int, bytes], ...]:
+        return self._opcodes
+    
+    @opcodes.setter
+    def opcodes(self, opcodes: List[Union[int, bytes]]):
+        # Stored as an immutable tuple of plain ints and bytes so execution
+        # never touches OpCode and derived forms stay valid until rebound
+        self._opcodes = tuple(op if isinstance(op, bytes) else int(op) for op in opcodes)
+        # Runtime form of the script with common sequences fused
+        self._program = self._fuse(self._opcodes)
+        self._cached_bytes = None
+    
+    @staticmethod
+    def _fuse(opcodes: Tuple[Union[int, bytes], ...]) -> Tuple[Any, ...]:
+        """
+        Rewrite OP_DUP OP_HASH160 <20 bytes> OP_EQUALVERIFY as one entry
+        
+        The fused entry is a (_FUSED_DUP_HASH160_EQV, expected_hash) tuple.
+        """
+        program = []
+        i = 0
+        n = len(opcodes)
+        while i < n:
+            op = opcodes[i]
+            if (op == _OP_DUP and i + 3 < n
+                    and opcodes[i + 1] == _OP_HASH160
+                    and isinstance(opcodes[i + 2], bytes)
+                    and len(opcodes[i + 2]) == 20
+                    and opcodes[i + 3] == _OP_EQUALVERIFY):
+                program.append((_FUSED_DUP_HASH160_EQV, opcodes[i + 2]))
+                i += 4
+            else:
+                program.append(op)
+                i += 1
+        return tuple(program)
+    
     def __repr__(self):
         result = []
         for op in self.opcodes:
@@ -208,47 +389,87 @@ class Script:
         return " ".join(result)
     
     def serialize(self) -> bytes:
-        """Serialize script to bytes"""
-        result = []
+        """Serialize script to bytes (computed once per opcodes binding)"""
+        if self._cached_bytes is None:
+            self._cached_bytes = self._serialize()
+        return self._cached_bytes
+    
+    def _serialize(self) -> bytes:
+        result = bytearray()
         for op in self.opcodes:
             if isinstance(op, bytes):
                 # Push data
                 length = len(op)
                 if length < 76:
-                    result.append(bytes([length]))
+                    result.append(length)
                 elif length <= 0xff:
-                    result.append(bytes([OpCode.OP_PUSHDATA1, length]))
+                    result.append(_OP_PUSHDATA1)
+                    result.append(length)
                 else:
-                    result.append(bytes([OpCode.OP_PUSHDATA2]) + struct.pack('<H', length))
-                result.append(op)
+                    result.append(_OP_PUSHDATA2)
+                    result += length.to_bytes(2, 'little')
+                result += op
             else:
                 # Opcode
-                result.append(bytes([op]))
-        return b''.join(result)
+                result.append(op)
+        return bytes(result)
+    
+    def match_p2pkh(self) -> Optional[bytes]:
+        """
+        Return the pubkey hash if this is a standard P2PKH ScriptPubKey
+        
+        Template: OP_DUP OP_HASH160 <20-byte-pubkey-hash> OP_EQUALVERIFY OP_CHECKSIG
+        """
+        ops = self.opcodes
+        if (len(ops) == 5
+                and ops[0] == _OP_DUP
+                and ops[1] == _OP_HASH160
+                and isinstance(ops[2], bytes) and len(ops[2]) == 20
+                and ops[3] == _OP_EQUALVERIFY
+                and ops[4] == _OP_CHECKSIG):
+            return ops[2]
+        return None
+    
+    def match_p2wpkh(self) -> Optional[bytes]:
+        """
+        Return the pubkey hash if this is a P2WPKH ScriptPubKey
+        
+        Template: OP_0 <20-byte-pubkey-hash>
+        """
+        ops = self.opcodes
+        if (len(ops) == 2
+                and ops[0] == _OP_0
+                and isinstance(ops[1], bytes) and len(ops[1]) == 20):
+            return ops[1]
+        return None
     
     @staticmethod
     def deserialize(data: bytes) -> 'Script':
-        """Deserialize script from bytes"""
+        """Deserialize script from bytes (or any bytes-like buffer)"""
+        # Parse through a memoryview so slicing never copies the input;
+        # only push payloads are materialized, as the interpreter expects bytes
+        view = memoryview(data)
+        end = len(view)
         opcodes = []
         i = 0
-        while i < len(data):
-            opcode = data[i]
+        while i < end:
+            opcode = view[i]
             i += 1
             
-            if opcode < OpCode.OP_PUSHDATA1:
+            if opcode < _OP_PUSHDATA1:
                 # Direct push of N bytes
                 length = opcode
-                opcodes.append(data[i:i+length])
+                opcodes.append(bytes(view[i:i+length]))
                 i += length
-            elif opcode == OpCode.OP_PUSHDATA1:
-                length = data[i]
+            elif opcode == _OP_PUSHDATA1:
+                length = view[i]
                 i += 1
-                opcodes.append(data[i:i+length])
+                opcodes.append(bytes(view[i:i+length]))
                 i += length
-            elif opcode == OpCode.OP_PUSHDATA2:
-                length = struct.unpack('<H', data[i:i+2])[0]
+            elif opcode == _OP_PUSHDATA2:
+                length = int.from_bytes(view[i:i+2], 'little')
                 i += 2
-                opcodes.append(data[i:i+length])
+                opcodes.append(bytes(view[i:i+length]))
                 i += length
             else:
                 opcodes.append(opcode)
@@ -261,12 +482,36 @@ class ScriptInterpreter:
     Bitcoin Script Interpreter
     
     Executes scripts in a stack-based virtual machine.
+    
+    With batch_mode=True, OP_CHECKSIG and OP_CHECKSIGVERIFY do not verify
+    immediately: they record (pubkey, message, signature), assume success,
+    and leave the real check to flush_verifications(). This suits block
+    validation, where any invalid signature rejects the whole script anyway.
     """
     
-    def __init__(self, transaction_context: Optional[dict] = None):
+    __slots__ = ('stack', 'alt_stack', 'transaction_context', 'batch_mode',
+                 '_pending', '_tx_data', '_now', '_height', '_tx_seq')
+    
+    def __init__(self, transaction_context: Optional[dict] = None,
+                 batch_mode: bool = False):
         self.stack: List[bytes] = []
         self.alt_stack: List[bytes] = []
         self.transaction_context = transaction_context or {}
+        self.batch_mode = batch_mode
+        self._pending: List[Tuple[bytes, bytes, bytes]] = []
+    
+    def _load_context(self):
+        """
+        Read the transaction context once so opcodes don't hit the dict
+        
+        Called at the start of every execution. Without a 'current_time'
+        entry, _now stays None until OP_CHECKLOCKTIMEVERIFY needs the clock.
+        """
+        context = self.transaction_context
+        self._tx_data = context.get('tx_data', b'')
+        self._now = context.get('current_time')
+        self._height = context.get('block_height', 0)
+        self._tx_seq = context.get('sequence', 0xffffffff)
     
     def execute(self, script: Script) -> bool:
         """
@@ -277,255 +522,455 @@ class ScriptInterpreter:
         2. Stack has at least one element
         3. Top element is True (non-zero)
         """
+        self._load_context()
+        
         try:
-            for op in script.opcodes:
+            # P2PKH fast path: skip the interpreter loop for the most common script
+            pubkey_hash = script.match_p2pkh()
+            if pubkey_hash is not None and len(self.stack) >= 2:
+                return self._execute_p2pkh(pubkey_hash)
+            
+            stack = self.stack
+            alt_stack = self.alt_stack
+            compiled = _COMPILED_SCRIPTS and _COMPILED_SCRIPTS.get(script.opcodes)
+            if compiled:
+                _COMPILED_SCRIPTS.move_to_end(script.opcodes)
+                compiled(self, stack, alt_stack)
+                if len(stack) == 0:
+                    return False
+                return self._cast_to_bool(stack[-1])
+            
+            push = stack.append
+            for op in script._program:
                 if isinstance(op, bytes):
                     # Push data onto stack
-                    self.stack.append(op)
+                    push(op)
+                elif isinstance(op, tuple):
+                    # Fused sequence carrying its own operand
+                    self._HANDLERS[op[0]](self, op[1])
                 else:
                     # Execute opcode
                     self._execute_opcode(op)
+                
+                if len(stack) + len(alt_stack) > MAX_STACK_SIZE:
+                    raise ScriptError("stack overflow")
             
             # Check final stack state
-            if len(self.stack) == 0:
+            if len(stack) == 0:
                 return False
             
             # Top element must be true
-            return self._cast_to_bool(self.stack[-1])
+            return self._cast_to_bool(stack[-1])
+        
+        except ScriptError as e:
+            print(f"Script execution failed: {e}")
+            return False
+    
+    def execute_p2wpkh(self, witness: List[bytes], script_pubkey: Script) -> bool:
+        """
+        Verify a P2WPKH output spent with the given witness
+        
+        The witness <signature> <pubkey> is checked exactly like P2PKH
+        against the 20-byte program in the ScriptPubKey.
+        """
+        pubkey_hash = script_pubkey.match_p2wpkh()
+        if pubkey_hash is None or len(witness) != 2:
+            return False
         
+        self._load_context()
+        self.stack.extend(witness)
+        try:
+            return self._execute_p2pkh(pubkey_hash)
         except ScriptError as e:
             print(f"Script execution failed: {e}")
             return False
     
+    def _execute_p2pkh(self, pubkey_hash: bytes) -> bool:
+        """
+        Straight-line OP_DUP OP_HASH160 <pubKeyHash> OP_EQUALVERIFY OP_CHECKSIG
+        
+        Leaves the stack exactly as the generic interpreter would, and
+        raises the same stack overflow for its two transient pushes.
+        """
+        stack = self.stack
+        if len(stack) + len(self.alt_stack) + 2 > MAX_STACK_SIZE:
+            raise ScriptError("stack overflow")
+        pubkey = stack[-1]
+        if _hash160_cached(pubkey) != pubkey_hash:
+            raise ScriptError("OP_EQUALVERIFY: equality check failed")
+        
+        stack.pop()
+        signature = stack.pop()
+        valid = self._check_signature(pubkey, signature)
+        stack.append(b'\x01' if valid else b'')
+        return valid
+    
+    def _check_signature(self, pubkey: bytes, signature: bytes) -> bool:
+        """Verify now, or defer to flush_verifications() in batch mode"""
+        if self.batch_mode:
+            self._pending.append((pubkey, self._tx_data, signature))
+            return True
+        return verify_signature(pubkey, self._tx_data, signature)
+    
+    def flush_verifications(self) -> bool:
+        """
+        Verify every signature deferred in batch mode
+        
+        Returns True only if all of them are valid. The pending list is
+        cleared either way.
+        """
+        pending = self._pending
+        if not pending:
+            return True
+        self._pending = []
+        public_keys, messages, signatures = zip(*pending)
+        return all(verify_signatures_batch(public_keys, messages, signatures))
+    
+    @classmethod
+    def compile(cls, script: Script) -> Callable[['ScriptInterpreter', List[bytes], List[bytes]], None]:
+        """
+        Generate a straight-line Python function for a script
+        
+        Each step of the script becomes one line calling its handler (or
+        appending its push) directly, with the stack size check after it,
+        so execution skips per-opcode type tests and table lookups. The
+        function is cached and execute() uses it for any Script with the
+        same opcodes; uncompiled scripts keep going through the interpreter.
+        Compiling is opt-in: until it is first called, execute() skips the
+        cache entirely. The cache keeps the most recently used
+        _MAX_COMPILED_SCRIPTS functions and drops older ones, which then
+        run through the interpreter again until recompiled.
+        """
+        compiled = _COMPILED_SCRIPTS.get(script.opcodes)
+        if compiled is not None:
+            _COMPILED_SCRIPTS.move_to_end(script.opcodes)
+            return compiled
+        
+        params = []
+        body = []
+        for i, op in enumerate(script._program):
+            if isinstance(op, bytes):
+                params.append(f"c{i}={op!r}")
+                body.append(f"append(c{i})")
+            elif isinstance(op, tuple):
+                params.append(f"h{i}=_HANDLERS[{op[0]}], a{i}={op[1]!r}")
+                body.append(f"h{i}(self, a{i})")
+            elif op in cls._HANDLERS:
+                params.append(f"h{i}=_HANDLERS[{op}]")
+                body.append(f"h{i}(self)")
+            else:
+                message = f"Unknown or unimplemented opcode: {op:02x}"
+                body.append(f"raise ScriptError({message!r})")
+            body.append("if len(stack) + len(alt_stack) > MAX_STACK_SIZE: "
+                        "raise ScriptError('stack overflow')")
+        
+        source = "def _run(self, stack, alt_stack"
+        source += "".join(", " + param for param in params)
+        source += "):\n    append = stack.append\n"
+        source += "".join(f"    {line}\n" for line in body)
+        
+        namespace = {'_HANDLERS': cls._HANDLERS, 'ScriptError': ScriptError,
+                     'MAX_STACK_SIZE': MAX_STACK_SIZE}
+        exec(compile(source, '<script>', 'exec'), namespace)
+        compiled = namespace['_run']
+        _COMPILED_SCRIPTS[script.opcodes] = compiled
+        if len(_COMPILED_SCRIPTS) > _MAX_COMPILED_SCRIPTS:
+            _COMPILED_SCRIPTS.popitem(last=False)
+        return compiled
+    
     def _execute_opcode(self, opcode: int):
         """Execute a single opcode"""
+        handler = self._HANDLERS.get(opcode)
+        if handler is None:
+            raise ScriptError(f"Unknown or unimplemented opcode: {opcode:02x}")
+        handler(self)
+    
+    # Constants
+    
+    def _push_num(self, n: int):
+        """OP_0, OP_1NEGATE, OP_1 ... OP_16"""
+        self.stack.append(self._encode_num(n))
+    
+    # Flow control
+    
+    def _op_nop(self):
+        pass  # NOP opcodes do nothing
+    
+    def _op_verify(self):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_VERIFY: stack underflow")
+        if not self._cast_to_bool(stack[-1]):
+            raise ScriptError("OP_VERIFY: verify failed")
+        stack.pop()
+    
+    def _op_return(self):
+        raise ScriptError("OP_RETURN: script failed")
+    
+    # Stack operations
+    
+    def _op_dup(self):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_DUP: stack underflow")
+        stack.append(stack[-1])
+    
+    def _op_drop(self):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_DROP: stack underflow")
+        stack.pop()
+    
+    def _op_swap(self):
+        stack = self.stack
+        if len(stack) < 2:
+            raise ScriptError("OP_SWAP: stack underflow")
+        stack[-1], stack[-2] = stack[-2], stack[-1]
+    
+    def _op_2dup(self):
+        stack = self.stack
+        if len(stack) < 2:
+            raise ScriptError("OP_2DUP: stack underflow")
+        stack += stack[-2:]
+    
+    def _op_3dup(self):
+        stack = self.stack
+        if len(stack) < 3:
+            raise ScriptError("OP_3DUP: stack underflow")
+        stack += stack[-3:]
+    
+    def _op_over(self):
+        stack = self.stack
+        if len(stack) < 2:
+            raise ScriptError("OP_OVER: stack underflow")
+        stack.append(stack[-2])
+    
+    def _op_rot(self):
+        stack = self.stack
+        if len(stack) < 3:
+            raise ScriptError("OP_ROT: stack underflow")
+        stack.append(stack.pop(-3))
+    
+    # Bitwise logic
+    
+    def _op_equal(self):
+        stack = self.stack
+        if len(stack) < 2:
+            raise ScriptError("OP_EQUAL: stack underflow")
+        a = stack.pop()
+        b = stack.pop()
+        stack.append(b'\x01' if a == b else b'')
+    
+    def _op_equalverify(self):
+        stack = self.stack
+        if len(stack) < 2:
+            raise ScriptError("OP_EQUALVERIFY: stack underflow")
+        a = stack.pop()
+        b = stack.pop()
+        if a != b:
+            raise ScriptError("OP_EQUALVERIFY: equality check failed")
+    
+    def _op_dup_hash160_equalverify(self, expected: bytes):
+        """OP_DUP OP_HASH160 <expected> OP_EQUALVERIFY without touching the stack"""
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_DUP: stack underflow")
+        # The unfused sequence briefly holds two extra elements
+        if len(stack) + len(self.alt_stack) + 2 > MAX_STACK_SIZE:
+            raise ScriptError("stack overflow")
+        if _hash160_cached(stack[-1]) != expected:
+            raise ScriptError("OP_EQUALVERIFY: equality check failed")
+    
+    # Arithmetic
+    
+    def _op_unary_num(self, opcode: int, fn: Callable[[int], int]):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError(f"{OpCode(opcode).name}: stack underflow")
+        a = self._decode_num(stack.pop())
+        stack.append(self._encode_num(fn(a)))
+    
+    def _op_binary_num(self, opcode: int, fn: Callable[[int, int], int]):
+        stack = self.stack
+        if len(stack) < 2:
+            raise ScriptError(f"{OpCode(opcode).name}: stack underflow")
+        b = self._decode_num(stack.pop())
+        a = self._decode_num(stack.pop())
+        stack.append(self._encode_num(fn(a, b)))
+    
+    # Crypto
+    
+    def _op_sha256(self):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_SHA256: stack underflow")
+        data = stack.pop()
+        stack.append(_sha256_cached(data))
+    
+    def _op_hash160(self):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_HASH160: stack underflow")
+        data = stack.pop()
+        stack.append(_hash160_cached(data))
+    
+    def _op_hash256(self):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_HASH256: stack underflow")
+        data = stack.pop()
+        stack.append(_hash256_cached(data))
+    
+    def _op_checksig(self):
+        stack = self.stack
+        if len(stack) < 2:
+            raise ScriptError("OP_CHECKSIG: stack underflow")
+        pubkey = stack.pop()
+        signature = stack.pop()
         
-        # Constants
-        if OpCode.OP_0 <= opcode <= OpCode.OP_16:
-            if opcode == OpCode.OP_0:
-                self.stack.append(b'')
-            else:
-                self.stack.append(self._encode_num(opcode - OpCode.OP_1 + 1))
-            return
-        
-        # Flow control
-        if opcode == OpCode.OP_NOP:
-            pass
-        elif opcode == OpCode.OP_VERIFY:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_VERIFY: stack underflow")
-            if not self._cast_to_bool(self.stack[-1]):
-                raise ScriptError("OP_VERIFY: verify failed")
-            self.stack.pop()
-        elif opcode == OpCode.OP_RETURN:
-            raise ScriptError("OP_RETURN: script failed")
-        
-        # Stack operations
-        elif opcode == OpCode.OP_DUP:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_DUP: stack underflow")
-            self.stack.append(self.stack[-1])
-        
-        elif opcode == OpCode.OP_DROP:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_DROP: stack underflow")
-            self.stack.pop()
-        
-        elif opcode == OpCode.OP_SWAP:
-            if len(self.stack) < 2:
-                raise ScriptError("OP_SWAP: stack underflow")
-            self.stack[-1], self.stack[-2] = self.stack[-2], self.stack[-1]
-        
-        elif opcode == OpCode.OP_2DUP:
-            if len(self.stack) < 2:
-                raise ScriptError("OP_2DUP: stack underflow")
-            self.stack.extend([self.stack[-2], self.stack[-1]])
-        
-        elif opcode == OpCode.OP_3DUP:
-            if len(self.stack) < 3:
-                raise ScriptError("OP_3DUP: stack underflow")
-            self.stack.extend([self.stack[-3], self.stack[-2], self.stack[-1]])
-        
-        elif opcode == OpCode.OP_OVER:
-            if len(self.stack) < 2:
-                raise ScriptError("OP_OVER: stack underflow")
-            self.stack.append(self.stack[-2])
-        
-        elif opcode == OpCode.OP_ROT:
-            if len(self.stack) < 3:
-                raise ScriptError("OP_ROT: stack underflow")
-            self.stack[-3], self.stack[-2], self.stack[-1] = \
-                self.stack[-2], self.stack[-1], self.stack[-3]
-        
-        # Bitwise logic
-        elif opcode == OpCode.OP_EQUAL:
-            if len(self.stack) < 2:
-                raise ScriptError("OP_EQUAL: stack underflow")
-            a = self.stack.pop()
-            b = self.stack.pop()
-            self.stack.append(b'\x01' if a == b else b'')
-        
-        elif opcode == OpCode.OP_EQUALVERIFY:
-            if len(self.stack) < 2:
-                raise ScriptError("OP_EQUALVERIFY: stack underflow")
-            a = self.stack.pop()
-            b = self.stack.pop()
-            if a != b:
-                raise ScriptError("OP_EQUALVERIFY: equality check failed")
-        
-        # Arithmetic
-        elif opcode == OpCode.OP_1ADD:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_1ADD: stack underflow")
-            n = self._decode_num(self.stack.pop())
-            self.stack.append(self._encode_num(n + 1))
-        
-        elif opcode == OpCode.OP_1SUB:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_1SUB: stack underflow")
-            n = self._decode_num(self.stack.pop())
-            self.stack.append(self._encode_num(n - 1))
-        
-        elif opcode == OpCode.OP_ADD:
-            if len(self.stack) < 2:
-                raise ScriptError("OP_ADD: stack underflow")
-            b = self._decode_num(self.stack.pop())
-            a = self._decode_num(self.stack.pop())
-            self.stack.append(self._encode_num(a + b))
-        
-        elif opcode == OpCode.OP_SUB:
-            if len(self.stack) < 2:
-                raise ScriptError("OP_SUB: stack underflow")
-            b = self._decode_num(self.stack.pop())
-            a = self._decode_num(self.stack.pop())
-            self.stack.append(self._encode_num(a - b))
-        
-        # Crypto
-        elif opcode == OpCode.OP_SHA256:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_SHA256: stack underflow")
-            data = self.stack.pop()
-            self.stack.append(sha256(data))
-        
-        elif opcode == OpCode.OP_HASH160:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_HASH160: stack underflow")
-            data = self.stack.pop()
-            self.stack.append(hash160(data))
-        
-        elif opcode == OpCode.OP_HASH256:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_HASH256: stack underflow")
-            data = self.stack.pop()
-            self.stack.append(hash256(data))
-        
-        elif opcode == OpCode.OP_CHECKSIG:
-            if len(self.stack) < 2:
-                raise ScriptError("OP_CHECKSIG: stack underflow")
-            pubkey = self.stack.pop()
-            signature = self.stack.pop()
-            
-            # Get transaction data to verify
-            tx_data = self.transaction_context.get('tx_data', b'')
-            
-            # Verify signature
-            valid = verify_signature(pubkey, tx_data, signature)
-            self.stack.append(b'\x01' if valid else b'')
-        
-        elif opcode == OpCode.OP_CHECKSIGVERIFY:
-            if len(self.stack) < 2:
-                raise ScriptError("OP_CHECKSIGVERIFY: stack underflow")
-            pubkey = self.stack.pop()
-            signature = self.stack.pop()
-            
-            tx_data = self.transaction_context.get('tx_data', b'')
-            
-            if not verify_signature(pubkey, tx_data, signature):
-                raise ScriptError("OP_CHECKSIGVERIFY: signature verification failed")
+        # Verify signature against the transaction data
+        valid = self._check_signature(pubkey, signature)
+        stack.append(b'\x01' if valid else b'')
+    
+    def _op_checksigverify(self):
+        stack = self.stack
+        if len(stack) < 2:
+            raise ScriptError("OP_CHECKSIGVERIFY: stack underflow")
+        pubkey = stack.pop()
+        signature = stack.pop()
         
-        elif opcode == OpCode.OP_CHECKMULTISIG:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_CHECKMULTISIG: stack underflow")
-            
-            # Get number of public keys
-            n = self._decode_num(self.stack.pop())
-            if len(self.stack) < n:
-                raise ScriptError("OP_CHECKMULTISIG: not enough public keys")
-            
-            pubkeys = [self.stack.pop() for _ in range(n)]
-            
-            # Get number of signatures
-            if len(self.stack) < 1:
-                raise ScriptError("OP_CHECKMULTISIG: stack underflow")
-            m = self._decode_num(self.stack.pop())
-            if len(self.stack) < m:
-                raise ScriptError("OP_CHECKMULTISIG: not enough signatures")
-            
-            signatures = [self.stack.pop() for _ in range(m)]
-            
-            # Bug compatibility: extra value popped (OP_CHECKMULTISIG bug)
-            if len(self.stack) < 1:
-                raise ScriptError("OP_CHECKMULTISIG: stack underflow (bug)")
-            self.stack.pop()
-            
-            # Verify signatures
-            tx_data = self.transaction_context.get('tx_data', b'')
-            sig_index = 0
-            
-            for pubkey in reversed(pubkeys):
-                if sig_index >= len(signatures):
-                    break
-                if verify_signature(pubkey, tx_data, signatures[sig_index]):
-                    sig_index += 1
-            
-            valid = sig_index == m
-            self.stack.append(b'\x01' if valid else b'')
+        if not self._check_signature(pubkey, signature):
+            raise ScriptError("OP_CHECKSIGVERIFY: signature verification failed")
+    
+    def _op_checkmultisig(self):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_CHECKMULTISIG: stack underflow")
         
-        # Timelocks
-        elif opcode == OpCode.OP_CHECKLOCKTIMEVERIFY:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_CHECKLOCKTIMEVERIFY: stack underflow")
-            
-            locktime = self._decode_num(self.stack[-1])  # Don't pop
-            tx_locktime = self.transaction_context.get('locktime', 0)
-            current_time = self.transaction_context.get('current_time', int(time.time()))
-            
-            # Check if locktime has passed
-            if locktime < 500000000:
-                # Block height
-                current_height = self.transaction_context.get('block_height', 0)
-                if locktime > current_height:
-                    raise ScriptError("OP_CHECKLOCKTIMEVERIFY: locktime not met (block height)")
+        # Get number of public keys
+        n = self._decode_num(stack.pop())
+        if len(stack) < n:
+            raise ScriptError("OP_CHECKMULTISIG: not enough public keys")
+        
+        pubkeys = [stack.pop() for _ in range(n)]
+        
+        # Get number of signatures
+        if len(stack) < 1:
+            raise ScriptError("OP_CHECKMULTISIG: stack underflow")
+        m = self._decode_num(stack.pop())
+        if len(stack) < m:
+            raise ScriptError("OP_CHECKMULTISIG: not enough signatures")
+        
+        signatures = [stack.pop() for _ in range(m)]
+        
+        # Bug compatibility: extra value popped (OP_CHECKMULTISIG bug)
+        if len(stack) < 1:
+            raise ScriptError("OP_CHECKMULTISIG: stack underflow (bug)")
+        stack.pop()
+        
+        # Verify signatures
+        tx_data = self._tx_data
+        
+        # Signatures are matched to keys in order, so signature j can only
+        # pair with key k when j <= k and enough keys remain for the rest.
+        # Each signature's remaining keys go out as one batch, consumed only
+        # up to the first match, so no key is verified more than once.
+        keys = pubkeys[::-1]
+        slack = n - m
+        valid = True
+        k = 0
+        for j, signature in enumerate(signatures):
+            results = verify_signatures_batch(keys[k:j + slack + 1],
+                                              repeat(tx_data), repeat(signature))
+            for k, ok in enumerate(results, k):
+                if ok:
+                    break
             else:
-                # Timestamp
-                if locktime > current_time:
-                    raise ScriptError("OP_CHECKLOCKTIMEVERIFY: locktime not met (timestamp)")
+                valid = False
+                break
+            k += 1
+        stack.append(b'\x01' if valid else b'')
+    
+    # Timelocks
+    
+    def _op_checklocktimeverify(self):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_CHECKLOCKTIMEVERIFY: stack underflow")
         
-        elif opcode == OpCode.OP_CHECKSEQUENCEVERIFY:
-            if len(self.stack) < 1:
-                raise ScriptError("OP_CHECKSEQUENCEVERIFY: stack underflow")
-            
-            sequence = self._decode_num(self.stack[-1])  # Don't pop
-            tx_sequence = self.transaction_context.get('sequence', 0xffffffff)
-            
-            # Check relative locktime
-            if sequence < 0:
-                raise ScriptError("OP_CHECKSEQUENCEVERIFY: negative sequence")
-            
-            # Simplified check (real Bitcoin has complex logic)
-            if sequence > tx_sequence:
-                raise ScriptError("OP_CHECKSEQUENCEVERIFY: sequence not met")
+        locktime = self._decode_num(stack[-1])  # Don't pop
         
+        # Check if locktime has passed
+        if locktime < 500000000:
+            # Block height
+            if locktime > self._height:
+                raise ScriptError("OP_CHECKLOCKTIMEVERIFY: locktime not met (block height)")
         else:
-            # Unknown or unimplemented opcode
-            if opcode in [OpCode.OP_NOP1, OpCode.OP_NOP4, OpCode.OP_NOP5,
-                         OpCode.OP_NOP6, OpCode.OP_NOP7, OpCode.OP_NOP8,
-                         OpCode.OP_NOP9, OpCode.OP_NOP10]:
-                pass  # NOP opcodes do nothing
-            else:
-                raise ScriptError(f"Unknown or unimplemented opcode: {opcode:02x}")
+            # Timestamp
+            if self._now is None:
+                self._now = int(time.time())
+            if locktime > self._now:
+                raise ScriptError("OP_CHECKLOCKTIMEVERIFY: locktime not met (timestamp)")
+    
+    def _op_checksequenceverify(self):
+        stack = self.stack
+        if len(stack) < 1:
+            raise ScriptError("OP_CHECKSEQUENCEVERIFY: stack underflow")
+        
+        sequence = self._decode_num(stack[-1])  # Don't pop
+        
+        # Check relative locktime
+        if sequence < 0:
+            raise ScriptError("OP_CHECKSEQUENCEVERIFY: negative sequence")
+        
+        # Simplified check (real Bitcoin has complex logic)
+        if sequence > self._tx_seq:
+            raise ScriptError("OP_CHECKSEQUENCEVERIFY: sequence not met")
+    
+    # Opcode -> handler dispatch table, built once at class creation
+    _HANDLERS = {
+        OpCode.OP_VERIFY: _op_verify,
+        OpCode.OP_RETURN: _op_return,
+        OpCode.OP_DUP: _op_dup,
+        OpCode.OP_DROP: _op_drop,
+        OpCode.OP_SWAP: _op_swap,
+        OpCode.OP_2DUP: _op_2dup,
+        OpCode.OP_3DUP: _op_3dup,
+        OpCode.OP_OVER: _op_over,
+        OpCode.OP_ROT: _op_rot,
+        OpCode.OP_EQUAL: _op_equal,
+        OpCode.OP_EQUALVERIFY: _op_equalverify,
+        OpCode.OP_SHA256: _op_sha256,
+        OpCode.OP_HASH160: _op_hash160,
+        OpCode.OP_HASH256: _op_hash256,
+        OpCode.OP_CHECKSIG: _op_checksig,
+        OpCode.OP_CHECKSIGVERIFY: _op_checksigverify,
+        OpCode.OP_CHECKMULTISIG: _op_checkmultisig,
+        OpCode.OP_CHECKLOCKTIMEVERIFY: _op_checklocktimeverify,
+        OpCode.OP_CHECKSEQUENCEVERIFY: _op_checksequenceverify,
+    }
+    
+    for _opcode in _NOP_OPS:
+        _HANDLERS[_opcode] = _op_nop
+    
+    # Number pushes: everything from OP_0 up to OP_16 (OP_1NEGATE pushes -1)
+    for _opcode in range(OpCode.OP_0, OpCode.OP_16 + 1):
+        _HANDLERS[_opcode] = functools.partial(
+            _push_num, n=0 if _opcode == OpCode.OP_0 else _opcode - OpCode.OP_1 + 1)
+    
+    # Numeric opcodes share one handler per arity, bound to their operation
+    for _opcode, _fn in _UNARY_NUM_OPS.items():
+        _HANDLERS[_opcode] = functools.partial(_op_unary_num, opcode=_opcode, fn=_fn)
+    for _opcode, _fn in _BINARY_NUM_OPS.items():
+        _HANDLERS[_opcode] = functools.partial(_op_binary_num, opcode=_opcode, fn=_fn)
+    del _opcode, _fn
+    _HANDLERS[_FUSED_DUP_HASH160_EQV] = _op_dup_hash160_equalverify
+    
+    # Key the table by plain ints so lookups never go through OpCode
+    _HANDLERS = {int(opcode): handler for opcode, handler in _HANDLERS.items()}
     
-    def _cast_to_bool(self, data: bytes) -> bool:
+    @staticmethod
+    def _cast_to_bool(data: bytes) -> bool:
         """Cast bytes to boolean (Bitcoin semantics)"""
         if len(data) == 0:
             return False
@@ -535,7 +980,8 @@ class ScriptInterpreter:
         # All other values are true
         return True
     
-    def _encode_num(self, n: int) -> bytes:
+    @staticmethod
+    def _encode_num(n: int) -> bytes:
         """Encode integer to Bitcoin script number format"""
         if n == 0:
             return b''
@@ -543,36 +989,29 @@ class ScriptInterpreter:
         negative = n < 0
         n = abs(n)
         
-        result = []
-        while n > 0:
-            result.append(n & 0xff)
-            n >>= 8
+        # Reserve the top bit of the last byte for the sign: a magnitude that
+        # already fills it (bit_length a multiple of 8) gets an extra byte
+        length = (n.bit_length() + 8) // 8
         
-        # Set sign bit
-        if result[-1] & 0x80:
-            result.append(0x80 if negative else 0x00)
-        elif negative:
-            result[-1] |= 0x80
+        # Set sign bit before the single to_bytes call
+        if negative:
+            n |= 1 << (length * 8 - 1)
         
-        return bytes(result)
+        return n.to_bytes(length, 'little')
     
-    def _decode_num(self, data: bytes) -> int:
+    @staticmethod
+    def _decode_num(data: bytes) -> int:
         """Decode Bitcoin script number to integer"""
         if len(data) == 0:
             return 0
         
-        # Check sign bit
-        negative = data[-1] & 0x80
+        result = int.from_bytes(data, 'little')
         
-        # Remove sign bit
-        if negative:
-            data = data[:-1] + bytes([data[-1] & 0x7f])
+        # Check sign bit and clear it from the magnitude
+        if data[-1] & 0x80:
+            return -(result & ~(0x80 << (8 * (len(data) - 1))))
         
-        result = 0
-        for i, byte in enumerate(data):
-            result |= byte << (8 * i)
-        
-        return -result if negative else result
+        return result
 
 
 # ============================================================================
@@ -695,7 +1134,7 @@ class ScriptTemplates:
         Funds can only be spent after locktime (block height or timestamp).
         """
         return Script([
-            ScriptInterpreter()._encode_num(locktime),
+            ScriptInterpreter._encode_num(locktime),
             OpCode.OP_CHECKLOCKTIMEVERIFY,
             OpCode.OP_DROP,
             OpCode.OP_DUP,
@@ -716,7 +1155,7 @@ class ScriptTemplates:
         Funds can be spent after N blocks from when UTXO was created.
         """
         return Script([
-            ScriptInterpreter()._encode_num(sequence),
+            ScriptInterpreter._encode_num(sequence),
             OpCode.OP_CHECKSEQUENCEVERIFY,
             OpCode.OP_DROP,
             OpCode.OP_DUP,
@@ -753,7 +1192,7 @@ class ScriptTemplates:
             OpCode.OP_HASH160,
             recipient_pubkey_hash,
             OpCode.OP_ELSE,
-            ScriptInterpreter()._encode_num(timeout),
+            ScriptInterpreter._encode_num(timeout),
             OpCode.OP_CHECKLOCKTIMEVERIFY,
             OpCode.OP_DROP,
             OpCode.OP_DUP,
@@ -769,6 +1208,26 @@ class ScriptTemplates:
 # DEMONSTRATION FUNCTIONS
 # ============================================================================
 
+# Demo keys come from one secrets seed expanded with SHAKE256, so looping the
+# demos doesn't cost an os.urandom call per key. Not for real key material:
+# production code should keep using secrets.token_bytes.
+_DEMO_SEED = secrets.token_bytes(32)
+_demo_pool = bytearray()
+_demo_counter = 0
+
+
+def fast_token_bytes(n: int) -> bytes:
+    """n pseudo-random bytes from the demo SHAKE256 stream"""
+    global _demo_counter
+    while len(_demo_pool) < n:
+        _demo_pool.extend(hashlib.shake_256(
+            _DEMO_SEED + _demo_counter.to_bytes(8, 'little')).digest(4096))
+        _demo_counter += 1
+    chunk = bytes(_demo_pool[:n])
+    del _demo_pool[:n]
+    return chunk
+
+
 def demo_p2pkh():
     """Demonstrate P2PKH (Pay-to-PubKey-Hash) transaction"""
     print("\n" + "="*70)
@@ -776,7 +1235,7 @@ def demo_p2pkh():
     print("="*70)
     
     # Generate keys
-    private_key = secrets.token_bytes(32)
+    private_key = fast_token_bytes(32)
     public_key = sha256(private_key + b'pubkey')
     pubkey_hash = hash160(public_key)
     
@@ -827,7 +1286,7 @@ def demo_p2sh_multisig():
     keys = []
     pubkeys = []
     for i in range(3):
-        private = secrets.token_bytes(32)
+        private = fast_token_bytes(32)
         public = sha256(private + b'pubkey')
         keys.append(private)
         pubkeys.append(public)
@@ -894,7 +1353,7 @@ def demo_timelock_cltv():
     print("="*70)
     
     # Generate keys
-    private_key = secrets.token_bytes(32)
+    private_key = fast_token_bytes(32)
     public_key = sha256(private_key + b'pubkey')
     pubkey_hash = hash160(public_key)
     
@@ -951,7 +1410,7 @@ def demo_segwit_p2wpkh():
     print("="*70)
     
     # Generate keys
-    private_key = secrets.token_bytes(32)
+    private_key = fast_token_bytes(32)
     public_key = sha256(private_key + b'pubkey')
     pubkey_hash = hash160(public_key)
     
@@ -979,6 +1438,10 @@ def demo_segwit_p2wpkh():
     print(f"   Witness:   <signature> <pubkey>")
     print(f"   Signature: {signature.hex()[:32]}...")
     print(f"   PubKey:    {public_key.hex()[:32]}...")
+    
+    interpreter = ScriptInterpreter({'tx_data': tx_data})
+    success = interpreter.execute_p2wpkh([signature, public_key], script_pubkey)
+    print(f"   Witness verification: {'✅' if success else '❌'}")
 
 
 def main():
@@ -3,10 +3,13 @@ Educational Bitcoin Implementation
 Demonstrates core Bitcoin concepts: UTXO model, mining, transactions, digital signatures, and basic P2P
 """
 
+import functools
 import hashlib
+import operator
 import time
 import json
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
 import struct
@@ -14,28 +17,75 @@ import secrets
 import hmac
 
 
+# Precompiled little-endian layouts used by serialization
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_TX_HEADER = struct.Struct('<II')  # timestamp, input count
+_BLOCK_PREFIX = struct.Struct('<IQ')  # index, timestamp
+_BLOCK_SUFFIX = struct.Struct('<I32s')  # difficulty, merkle root (then the nonce)
+
+# Hashes are stored as raw 32-byte digests and hex-encoded only for display.
+# The all-zero hash marks coinbase inputs and the genesis block's parent.
+NULL_HASH = bytes(32)
+
+
 # ============================================================================
 # CRYPTOGRAPHIC PRIMITIVES
 # ============================================================================
 
+_sha256 = hashlib.sha256
+# hashlib.new() looks the algorithm up by name on every call; copying a
+# pristine RIPEMD160 object skips that lookup
+_RIPEMD160 = hashlib.new('ripemd160')
+
+
 def sha256(data: bytes) -> bytes:
     """Single SHA256 hash"""
-    return hashlib.sha256(data).digest()
+    return _sha256(data).digest()
 
 
 def hash256(data: bytes) -> bytes:
     """Double SHA256 hash (Bitcoin standard)"""
-    return sha256(sha256(data))
+    # Both rounds in one expression: no intermediate Python-level calls
+    return _sha256(_sha256(data).digest()).digest()
+
+
+def hash256_many(items: List[bytes]) -> List[bytes]:
+    """Double SHA256 over a batch of inputs (one merkle tree level)"""
+    sha = _sha256
+    return [sha(sha(data).digest()).digest() for data in items]
+
+
+def compute_merkle_root(hashes: List[bytes]) -> bytes:
+    """
+    Merkle root of a list of 32-byte hashes
+    
+    Adjacent hashes are paired and double-hashed level by level; an odd
+    level duplicates its last hash, as in Bitcoin.
+    """
+    if not hashes:
+        return bytes(32)
+    
+    level = list(hashes)
+    while len(level) > 1:
+        if len(level) % 2 == 1:
+            level.append(level[-1])
+        level = hash256_many([level[i] + level[i + 1] for i in range(0, len(level), 2)])
+    return level[0]
 
 
 def ripemd160(data: bytes) -> bytes:
     """RIPEMD160 hash"""
-    return hashlib.new('ripemd160', data).digest()
+    h = _RIPEMD160.copy()
+    h.update(data)
+    return h.digest()
 
 
 def hash160(data: bytes) -> bytes:
     """SHA256 followed by RIPEMD160 (used for addresses)"""
-    return ripemd160(sha256(data))
+    h = _RIPEMD160.copy()
+    h.update(_sha256(data).digest())
+    return h.digest()
 
 
 # ============================================================================
@@ -52,6 +102,9 @@ class Wallet:
         # Generate a random 32-byte private key
         self.private_key = secrets.token_bytes(32)
         
+        # Keyed HMAC state, copied per signature so the key pads are hashed once
+        self._hmac_proto = hmac.new(self.private_key, b'', hashlib.sha256)
+        
         # Derive public key from private key (simplified - real Bitcoin uses EC point multiplication)
         self.public_key = sha256(self.private_key + b'pubkey')
         
@@ -79,7 +132,9 @@ class Wallet:
         Sign a message with private key
         Uses HMAC-SHA256 (simplified - real Bitcoin uses ECDSA signatures)
         """
-        return hmac.new(self.private_key, message, hashlib.sha256).digest()
+        h = self._hmac_proto.copy()
+        h.update(message)
+        return h.digest()
     
     def verify(self, message: bytes, signature: bytes) -> bool:
         """Verify a signature"""
@@ -110,13 +165,17 @@ class Wallet:
 @dataclass
 class TxInput:
     """Transaction Input - references a previous output (UTXO)"""
-    prev_tx_hash: str  # Hash of the transaction containing the UTXO
+    prev_tx_hash: bytes  # Hash of the transaction containing the UTXO
     prev_output_index: int  # Index of the output in that transaction
     signature: bytes = b''  # Digital signature proving ownership
     public_key: bytes = b''  # Public key of the sender
     
+    @property
+    def prev_tx_hash_hex(self) -> str:
+        return self.prev_tx_hash.hex()
+    
     def __str__(self):
-        return f"TxInput(prev_tx: {self.prev_tx_hash[:8]}..., index: {self.prev_output_index})"
+        return f"TxInput(prev_tx: {self.prev_tx_hash_hex[:8]}..., index: {self.prev_output_index})"
 
 
 @dataclass
@@ -129,55 +188,154 @@ class TxOutput:
         return f"TxOutput(amount: {self.amount} sats, to: {self.recipient_address[:8]}...)"
 
 
+# Column extractors: map() over these walks a list of inputs/outputs in C
+_get_amount = operator.attrgetter('amount')
+_get_outpoint = operator.attrgetter('prev_tx_hash', 'prev_output_index')  # UTXO key
+
+
+# Specialized preimage serializers, generated per (input count, output count).
+# Each packs the whole fixed-width part with one Struct call; shapes larger
+# than _SER_MAX_SHAPE use the generic loop.
+_SER_CACHE: Dict[Tuple[int, int], Callable[['Transaction'], Optional[bytes]]] = {}
+_SER_MAX_SHAPE = 4
+
+
+def _build_serializer(n_in: int, n_out: int) -> Callable[['Transaction'], Optional[bytes]]:
+    """
+    Generate a serializer for transactions with n_in inputs and n_out outputs
+    
+    Output is byte-identical to Transaction._serialize_for_hashing. Returns
+    None when an input hash isn't 32 bytes, since '32s' would pad it.
+    """
+    ins = [f"i{i}" for i in range(n_in)]
+    outs = [f"o{i}" for i in range(n_out)]
+    fields = ["tx.timestamp", str(n_in)]
+    for name in ins:
+        fields += [f"{name}.prev_tx_hash", f"{name}.prev_output_index"]
+    fields.append(str(n_out))
+    tail = []
+    for name in outs:
+        tail += [f"u64({name}.amount)", f"{name}.recipient_address.encode()"]
+    
+    lines = [f"def _ser(tx, head=head, u64=u64):"]
+    if ins:
+        lines.append(f"    {', '.join(ins)}, = tx.inputs")
+        lengths = " or ".join(f"len({name}.prev_tx_hash) != 32" for name in ins)
+        lines.append(f"    if {lengths}: return None")
+    if outs:
+        lines.append(f"    {', '.join(outs)}, = tx.outputs")
+    parts = [f"head.pack({', '.join(fields)})"] + tail
+    lines.append(f"    return b''.join(({', '.join(parts)},))")
+    
+    namespace = {
+        'head': struct.Struct('<II' + '32sI' * n_in + 'I'),
+        'u64': _U64.pack,
+    }
+    exec("\n".join(lines), namespace)
+    return namespace['_ser']
+
+
 @dataclass
 class Transaction:
-    """Bitcoin Transaction"""
+    """
+    Bitcoin Transaction
+    
+    The hashing preimage and its hash are cached. Rebinding a field clears
+    the caches; after mutating the inputs or outputs lists in place, call
+    invalidate_cache().
+    """
     inputs: List[TxInput]
     outputs: List[TxOutput]
     timestamp: int = field(default_factory=lambda: int(time.time()))
-    tx_hash: str = ""
+    tx_hash: bytes = b""
+    _cached_preimage: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
+    _cached_hash_bytes: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
+    
+    # Fields serialized by serialize_for_hashing()
+    _PREIMAGE_FIELDS = frozenset({'inputs', 'outputs', 'timestamp'})
     
     def __post_init__(self):
         if not self.tx_hash:
-            self.tx_hash = self.calculate_hash()
+            self._update_hash()
+    
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self._PREIMAGE_FIELDS:
+            self.invalidate_cache()
+    
+    def invalidate_cache(self):
+        """Forget the cached preimage and hash"""
+        object.__setattr__(self, '_cached_preimage', None)
+        object.__setattr__(self, '_cached_hash_bytes', None)
     
-    def calculate_hash(self) -> str:
+    @property
+    def tx_hash_hex(self) -> str:
+        return self.tx_hash.hex()
+    
+    def calculate_hash(self) -> bytes:
         """Calculate transaction hash"""
-        tx_data = self.serialize_for_hashing()
-        return hash256(tx_data).hex()
+        if self._cached_hash_bytes is None:
+            self._cached_hash_bytes = hash256(self.serialize_for_hashing())
+        return self._cached_hash_bytes
+    
+    def _update_hash(self):
+        """Set tx_hash from the preimage digest"""
+        self.tx_hash = self.calculate_hash()
     
     def serialize_for_hashing(self) -> bytes:
         """Serialize transaction data for hashing (unsigned)"""
-        data = []
-        data.append(struct.pack('<I', self.timestamp))
-        data.append(struct.pack('<I', len(self.inputs)))
+        if self._cached_preimage is None:
+            self._cached_preimage = self._serialize_for_hashing()
+        return self._cached_preimage
+    
+    def _serialize_for_hashing(self) -> bytes:
+        shape = (len(self.inputs), len(self.outputs))
+        serializer = _SER_CACHE.get(shape)
+        if serializer is None and max(shape) <= _SER_MAX_SHAPE:
+            serializer = _SER_CACHE[shape] = _build_serializer(*shape)
+        if serializer is not None:
+            data = serializer(self)
+            if data is not None:
+                return data
+        return self._serialize_generic()
+    
+    def _serialize_generic(self) -> bytes:
+        data = bytearray(_TX_HEADER.pack(self.timestamp, len(self.inputs)))
+        pack_u32 = _U32.pack
+        pack_u64 = _U64.pack
         
         for inp in self.inputs:
-            data.append(inp.prev_tx_hash.encode())
-            data.append(struct.pack('<I', inp.prev_output_index))
+            data += inp.prev_tx_hash
+            data += pack_u32(inp.prev_output_index)
         
-        data.append(struct.pack('<I', len(self.outputs)))
+        data += pack_u32(len(self.outputs))
         for out in self.outputs:
-            data.append(struct.pack('<Q', out.amount))
-            data.append(out.recipient_address.encode())
+            data += pack_u64(out.amount)
+            data += out.recipient_address.encode()
         
-        return b''.join(data)
+        return bytes(data)
     
     def sign_inputs(self, wallet: Wallet, utxo_set: 'UTXOSet'):
         """Sign all inputs in the transaction"""
+        self.invalidate_cache()
         message = self.serialize_for_hashing()
         
+        # Every input signs the same message with the same key
+        signature = None
         for inp in self.inputs:
             # Verify the input references a valid UTXO owned by this wallet
-            utxo_key = f"{inp.prev_tx_hash}:{inp.prev_output_index}"
+            utxo_key = (inp.prev_tx_hash, inp.prev_output_index)
             if utxo_key in utxo_set.utxos:
                 utxo = utxo_set.utxos[utxo_key]
                 if utxo.recipient_address == wallet.address:
-                    inp.signature = wallet.sign(message)
+                    if signature is None:
+                        signature = wallet.sign(message)
+                    inp.signature = signature
                     inp.public_key = wallet.public_key
         
-        # Recalculate hash after signing
-        self.tx_hash = self.calculate_hash()
+        # Signatures are not part of the preimage, so one hash of the
+        # message above is the final tx_hash
+        self._update_hash()
     
     def verify_signatures(self, utxo_set: 'UTXOSet') -> bool:
         """Verify all input signatures"""
@@ -192,7 +350,7 @@ class Transaction:
                 return False
             
             # Verify the public key corresponds to the UTXO owner
-            utxo_key = f"{inp.prev_tx_hash}:{inp.prev_output_index}"
+            utxo_key = (inp.prev_tx_hash, inp.prev_output_index)
             if utxo_key not in utxo_set.utxos:
                 return False
             
@@ -203,14 +361,14 @@ class Transaction:
         return True
     
     def __str__(self):
-        return f"Transaction(hash: {self.tx_hash[:8]}..., inputs: {len(self.inputs)}, outputs: {len(self.outputs)})"
+        return f"Transaction(hash: {self.tx_hash_hex[:8]}..., inputs: {len(self.inputs)}, outputs: {len(self.outputs)})"
 
 
 def create_coinbase_transaction(miner_address: str, block_height: int, reward: int = 50_00000000) -> Transaction:
     """Create a coinbase transaction (mining reward)"""
     # Coinbase transactions have no inputs (money created from nothing)
     coinbase_input = TxInput(
-        prev_tx_hash="0" * 64,  # All zeros for coinbase
+        prev_tx_hash=NULL_HASH,  # All zeros for coinbase
         prev_output_index=0xFFFFFFFF,  # Max value indicates coinbase
         signature=b'',
         public_key=b''
@@ -235,45 +393,63 @@ class UTXOSet:
     """
     Unspent Transaction Output Set
     Keeps track of all unspent outputs in the blockchain
+    
+    Per-address balances and UTXOs are indexed as outputs are added and
+    removed, so address queries never scan the whole set.
     """
     
     def __init__(self):
-        self.utxos: Dict[str, TxOutput] = {}  # Key: "tx_hash:output_index"
+        self.utxos: Dict[Tuple[bytes, int], TxOutput] = {}  # Key: (tx_hash, output_index)
+        self.balances: Dict[str, int] = {}
+        # Address -> UTXOs it owns (a dict keeps them in insertion order)
+        self.by_address: Dict[str, Dict[Tuple[bytes, int], TxOutput]] = {}
     
-    def add_utxo(self, tx_hash: str, output_index: int, output: TxOutput):
+    def add_utxo(self, tx_hash: bytes, output_index: int, output: TxOutput):
         """Add a new UTXO"""
-        key = f"{tx_hash}:{output_index}"
+        key = (tx_hash, output_index)
+        previous = self.utxos.get(key)
+        if previous is not None:
+            self._unindex(key, previous)
         self.utxos[key] = output
+        
+        address = output.recipient_address
+        self.balances[address] = self.balances.get(address, 0) + output.amount
+        self.by_address.setdefault(address, {})[key] = output
     
-    def remove_utxo(self, tx_hash: str, output_index: int):
+    def remove_utxo(self, tx_hash: bytes, output_index: int):
         """Remove a spent UTXO"""
-        key = f"{tx_hash}:{output_index}"
-        if key in self.utxos:
-            del self.utxos[key]
+        key = (tx_hash, output_index)
+        output = self.utxos.pop(key, None)
+        if output is not None:
+            self._unindex(key, output)
+    
+    def _unindex(self, key: Tuple[bytes, int], output: TxOutput):
+        """Drop an output from the per-address indexes"""
+        address = output.recipient_address
+        owned = self.by_address[address]
+        del owned[key]
+        if owned:
+            self.balances[address] -= output.amount
+        else:
+            del self.by_address[address]
+            del self.balances[address]
     
     def get_balance(self, address: str) -> int:
         """Calculate balance for an address (sum of all UTXOs)"""
-        balance = 0
-        for utxo in self.utxos.values():
-            if utxo.recipient_address == address:
-                balance += utxo.amount
-        return balance
+        return self.balances.get(address, 0)
     
-    def get_utxos_for_address(self, address: str) -> List[Tuple[str, int, TxOutput]]:
+    def get_utxos_for_address(self, address: str) -> List[Tuple[bytes, int, TxOutput]]:
         """Get all UTXOs for a given address"""
-        result = []
-        for key, utxo in self.utxos.items():
-            if utxo.recipient_address == address:
-                tx_hash, output_index = key.split(':')
-                result.append((tx_hash, int(output_index), utxo))
-        return result
+        owned = self.by_address.get(address, {})
+        return [(tx_hash, output_index, utxo)
+                for (tx_hash, output_index), utxo in owned.items()]
     
     def update_with_transaction(self, tx: Transaction):
         """Update UTXO set with a new transaction"""
         # Remove spent UTXOs
         for inp in tx.inputs:
             # Skip coinbase inputs
-            if inp.prev_tx_hash != "0" * 64:
+            if inp.prev_tx_hash != NULL_HASH:
                 self.remove_utxo(inp.prev_tx_hash, inp.prev_output_index)
         
         # Add new UTXOs
@@ -285,43 +461,135 @@ class UTXOSet:
 # BLOCK & MINING
 # ============================================================================
 
+MINING_PROGRESS_INTERVAL = 100_000  # Attempts searched between progress checks
+MINING_PROGRESS_SECONDS = 1.0  # Minimum wall time between printed progress lines
+MAX_MINING_ATTEMPTS = 10_000_000  # Safety limit for demonstration
+MINING_BATCH_SIZE = 8  # Nonces hashed per batch before testing the target
+
+
+@functools.lru_cache(maxsize=None)
+def _pow_target(difficulty: int) -> bytes:
+    """
+    Largest digest whose hex form starts with `difficulty` zeros
+    
+    Digests are compared as 32-byte big-endian strings, so `digest <= target`
+    is the leading-zeros check without building the hex string.
+    """
+    if difficulty > 64:
+        return b''  # More zeros than hex digits: no digest qualifies
+    difficulty = max(difficulty, 0)
+    return (16 ** (64 - difficulty) - 1).to_bytes(32, 'big')
+
+
+def _meets_difficulty(digest: bytes, difficulty: int) -> bool:
+    """Proof-of-work check on a raw block hash"""
+    return digest <= _pow_target(difficulty)
+
+
+def _mine_header(prefix: bytes, difficulty: int,
+                 start: int, stop: int) -> Optional[Tuple[int, bytes]]:
+    """
+    Search nonces in [start, stop) for a block hash meeting the difficulty
+    
+    The serialized block is the 80-byte fixed prefix followed by the nonce,
+    so the first 64-byte SHA-256 block never changes. It is compressed once
+    into a midstate; each attempt copies that state and hashes only the
+    last 16 prefix bytes + nonce, one compression instead of two. Nonces
+    are hashed in batches and a whole batch is rejected with a single
+    compare. Returns (nonce, hash) for the first hit, or None.
+    """
+    target = _pow_target(difficulty)
+    sha = hashlib.sha256
+    midstate_copy = sha(prefix).copy
+    pack_nonce = _U32.pack
+    for batch_start in range(start, stop, MINING_BATCH_SIZE):
+        nonces = range(batch_start, min(batch_start + MINING_BATCH_SIZE, stop))
+        digests = []
+        for nonce in nonces:
+            inner = midstate_copy()
+            inner.update(pack_nonce(nonce))
+            digests.append(sha(inner.digest()).digest())
+        if min(digests) <= target:
+            for nonce, digest in zip(nonces, digests):
+                if digest <= target:
+                    return nonce, digest
+    return None
+
+
+def _mine_range(prefix: bytes, difficulty: int, start: int, stop: int,
+                pool: Optional[Executor] = None, workers: int = 1) -> Optional[Tuple[int, bytes]]:
+    """
+    _mine_header over [start, stop), split across a process pool if given
+    
+    Each worker searches one contiguous slice. Results are read back in
+    slice order, so the lowest winning nonce is returned and the outcome
+    matches a single-process search.
+    """
+    if pool is None or workers <= 1:
+        return _mine_header(prefix, difficulty, start, stop)
+    
+    step = -(-(stop - start) // workers)
+    futures = [pool.submit(_mine_header, prefix, difficulty, lo, min(lo + step, stop))
+               for lo in range(start, stop, step)]
+    try:
+        for future in futures:
+            found = future.result()
+            if found is not None:
+                return found
+        return None
+    finally:
+        for future in futures:
+            future.cancel()
+
+
 @dataclass
 class Block:
     """Bitcoin Block"""
     index: int
     timestamp: int
     transactions: List[Transaction]
-    previous_hash: str
+    previous_hash: bytes
     nonce: int = 0
-    hash: str = ""
-    difficulty: int = 4  # Number of leading zeros required
+    hash: bytes = b""
+    difficulty: int = 4  # Number of leading zero hex digits required
     
     def __post_init__(self):
         if not self.hash:
             self.hash = self.calculate_hash()
     
-    def calculate_hash(self) -> str:
+    @property
+    def hash_hex(self) -> str:
+        return self.hash.hex()
+    
+    @property
+    def previous_hash_hex(self) -> str:
+        return self.previous_hash.hex()
+    
+    def calculate_hash(self) -> bytes:
         """Calculate block hash"""
-        block_data = self.serialize()
-        return hash256(block_data).hex()
+        return hash256(self.serialize())
     
     def serialize(self) -> bytes:
         """Serialize block for hashing"""
-        data = []
-        data.append(struct.pack('<I', self.index))
-        data.append(struct.pack('<Q', self.timestamp))
-        data.append(self.previous_hash.encode())
-        data.append(struct.pack('<I', self.nonce))
-        data.append(struct.pack('<I', self.difficulty))
-        
-        for tx in self.transactions:
-            data.append(tx.tx_hash.encode())
-        
-        return b''.join(data)
+        return self._header_prefix() + _U32.pack(self.nonce)
+    
+    def _header_prefix(self) -> bytes:
+        """Serialized block data before the nonce (the nonce goes last)"""
+        return (_BLOCK_PREFIX.pack(self.index, self.timestamp) + self.previous_hash
+                + _BLOCK_SUFFIX.pack(self.difficulty, self.compute_merkle_root()))
+    
+    def compute_merkle_root(self) -> bytes:
+        """Merkle root committing to the block's transactions"""
+        return compute_merkle_root([tx.tx_hash for tx in self.transactions])
     
-    def mine_block(self, difficulty: Optional[int] = None) -> Tuple[int, float]:
+    def mine_block(self, difficulty: Optional[int] = None, workers: int = 1,
+                   progress_callback: Optional[Callable[[int, bytes], None]] = None) -> Tuple[int, float]:
         """
         Proof of Work mining
+        With workers > 1, nonce ranges are searched on that many processes
+        (hashlib holds the GIL for block-sized inputs, so threads don't scale).
+        Progress is printed at most once per MINING_PROGRESS_SECONDS, or
+        handed to progress_callback(attempts, hash) after every interval.
         Returns: (nonce, time_taken)
         """
         if difficulty is not None:
@@ -329,30 +597,51 @@ class Block:
         
         target = "0" * self.difficulty
         start_time = time.time()
+        last_log = time.monotonic()
         attempts = 0
         
         print(f"\n⛏️  Mining block {self.index}...")
         print(f"   Target: {target}...")
         
-        while True:
-            self.nonce = attempts
-            self.hash = self.calculate_hash()
-            
-            if attempts % 100000 == 0 and attempts > 0:
-                print(f"   Attempts: {attempts:,} | Hash: {self.hash[:10]}...")
-            
-            if self.hash.startswith(target):
-                time_taken = time.time() - start_time
-                print(f"✅ Block mined! Nonce: {self.nonce} | Time: {time_taken:.2f}s")
-                print(f"   Hash: {self.hash}")
-                return self.nonce, time_taken
-            
-            attempts += 1
-            
-            # Safety limit for demonstration
-            if attempts > 10_000_000:
-                print("⚠️  Mining taking too long, stopping...")
-                return self.nonce, time.time() - start_time
+        # Only the nonce changes between attempts
+        prefix = self._header_prefix()
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        
+        try:
+            while True:
+                # Search up to the next progress line in one call
+                stop = min(attempts + MINING_PROGRESS_INTERVAL, MAX_MINING_ATTEMPTS + 1)
+                found = _mine_range(prefix, self.difficulty, attempts, stop, pool, workers)
+                
+                if found is not None:
+                    self.nonce, self.hash = found
+                    time_taken = time.time() - start_time
+                    print(f"✅ Block mined! Nonce: {self.nonce} | Time: {time_taken:.2f}s")
+                    print(f"   Hash: {self.hash_hex}")
+                    return self.nonce, time_taken
+                
+                attempts = stop
+                
+                # Safety limit for demonstration
+                if attempts > MAX_MINING_ATTEMPTS:
+                    self.nonce = attempts - 1
+                    self.hash = self.calculate_hash()
+                    print("⚠️  Mining taking too long, stopping...")
+                    return self.nonce, time.time() - start_time
+                
+                if progress_callback is not None:
+                    self.nonce = attempts
+                    self.hash = self.calculate_hash()
+                    progress_callback(attempts, self.hash)
+                elif time.monotonic() - last_log >= MINING_PROGRESS_SECONDS:
+                    self.nonce = attempts
+                    self.hash = self.calculate_hash()
+                    print(f"   Attempts: {attempts:,} | Hash: {self.hash_hex[:10]}...")
+                    last_log = time.monotonic()
+        finally:
+            # _mine_range has already cancelled its unfinished slices
+            if pool is not None:
+                pool.shutdown()
 
 
 # ============================================================================
@@ -383,7 +672,7 @@ class Blockchain:
             index=0,
             timestamp=int(time.time()),
             transactions=[genesis_tx],
-            previous_hash="0" * 64,
+            previous_hash=NULL_HASH,
             difficulty=self.difficulty
         )
         
@@ -398,30 +687,31 @@ class Blockchain:
         """Add a transaction to pending transactions"""
         # Validate transaction
         if not self._validate_transaction(transaction):
-            print(f"❌ Invalid transaction: {transaction.tx_hash[:8]}...")
+            print(f"❌ Invalid transaction: {transaction.tx_hash_hex[:8]}...")
             return False
         
         self.pending_transactions.append(transaction)
-        print(f"✅ Transaction added to pending pool: {transaction.tx_hash[:8]}...")
+        print(f"✅ Transaction added to pending pool: {transaction.tx_hash_hex[:8]}...")
         return True
     
     def _validate_transaction(self, tx: Transaction) -> bool:
         """Validate a transaction"""
         # Skip validation for coinbase transactions
-        if len(tx.inputs) == 1 and tx.inputs[0].prev_tx_hash == "0" * 64:
+        if len(tx.inputs) == 1 and tx.inputs[0].prev_tx_hash == NULL_HASH:
             return True
         
         # Check inputs exist and are unspent
-        total_input = 0
-        for inp in tx.inputs:
-            utxo_key = f"{inp.prev_tx_hash}:{inp.prev_output_index}"
-            if utxo_key not in self.utxo_set.utxos:
-                print(f"   Input UTXO not found: {utxo_key}")
+        utxos = self.utxo_set.utxos
+        utxo_keys = list(map(_get_outpoint, tx.inputs))
+        for utxo_key in utxo_keys:
+            if utxo_key not in utxos:
+                tx_hash, output_index = utxo_key
+                print(f"   Input UTXO not found: {tx_hash.hex()}:{output_index}")
                 return False
-            total_input += self.utxo_set.utxos[utxo_key].amount
+        total_input = sum(map(_get_amount, map(utxos.__getitem__, utxo_keys)))
         
         # Check outputs
-        total_output = sum(out.amount for out in tx.outputs)
+        total_output = sum(map(_get_amount, tx.outputs))
         
         if total_output > total_input:
             print(f"   Output ({total_output}) exceeds input ({total_input})")
@@ -471,14 +761,29 @@ class Blockchain:
         print(f"💎 Block {new_block.index} added to blockchain!")
         return new_block
     
-    def is_chain_valid(self) -> bool:
-        """Validate the entire blockchain"""
+    def is_chain_valid(self, pool: Optional[Executor] = None,
+                       check_signatures: bool = False) -> bool:
+        """
+        Validate the entire blockchain
+        
+        Block hashes don't depend on each other, so they are all recomputed
+        first, on pool if one is given (hashlib holds the GIL for header-sized
+        inputs, so the default is a plain loop); the links and proof of work
+        are then checked in chain order. With check_signatures, every
+        non-coinbase input must also carry a valid signature.
+        """
+        if pool is None:
+            recomputed = list(map(Block.calculate_hash, self.chain[1:]))
+        else:
+            recomputed = list(pool.map(Block.calculate_hash, self.chain[1:]))
+        
         for i in range(1, len(self.chain)):
             current_block = self.chain[i]
             previous_block = self.chain[i - 1]
             
             # Verify hash
-            if current_block.hash != current_block.calculate_hash():
+            block_hash = recomputed[i - 1]
+            if current_block.hash != block_hash:
                 print(f"❌ Block {i} hash mismatch")
                 return False
             
@@ -488,13 +793,49 @@ class Blockchain:
                 return False
             
             # Verify proof of work
-            if not current_block.hash.startswith("0" * current_block.difficulty):
+            if not _meets_difficulty(block_hash, current_block.difficulty):
                 print(f"❌ Block {i} doesn't meet difficulty requirement")
                 return False
+            
+            # Verify input signatures
+            if check_signatures and not self._validate_block_parallel(current_block, pool=pool):
+                print(f"❌ Block {i} contains an invalid signature")
+                return False
         
         print("✅ Blockchain is valid!")
         return True
     
+    def _validate_block_parallel(self, block: Block, pool: Optional[Executor] = None) -> bool:
+        """
+        Verify every input signature in a block in one batch
+        
+        Signatures are independent of each other, so all (public key,
+        message, signature) triples are collected first and checked in one
+        pass. The demo's check is a length test, and hashlib holds the GIL
+        for inputs this small, so a plain loop is the default; pass pool to
+        spread a costlier verifier over an executor.
+        """
+        public_keys, messages, signatures = [], [], []
+        for tx in block.transactions:
+            # Coinbase inputs carry no signature
+            if len(tx.inputs) == 1 and tx.inputs[0].prev_tx_hash == NULL_HASH:
+                continue
+            
+            message = tx.serialize_for_hashing()
+            for inp in tx.inputs:
+                if not inp.signature or not inp.public_key:
+                    return False
+                public_keys.append(inp.public_key)
+                messages.append(message)
+                signatures.append(inp.signature)
+        
+        if not signatures:
+            return True
+        
+        if pool is None:
+            return all(map(Wallet.verify_with_pubkey, public_keys, messages, signatures))
+        return all(pool.map(Wallet.verify_with_pubkey, public_keys, messages, signatures))
+    
     def get_balance(self, address: str) -> int:
         """Get balance for an address"""
         return self.utxo_set.get_balance(address)
@@ -506,8 +847,8 @@ class Blockchain:
         print("="*70)
         for block in self.chain:
             print(f"\nBlock #{block.index}")
-            print(f"  Hash: {block.hash}")
-            print(f"  Previous: {block.previous_hash}")
+            print(f"  Hash: {block.hash_hex}")
+            print(f"  Previous: {block.previous_hash_hex}")
             print(f"  Timestamp: {block.timestamp}")
             print(f"  Nonce: {block.nonce}")
             print(f"  Transactions: {len(block.transactions)}")
@@ -548,7 +889,7 @@ class Node:
     
     def receive_transaction(self, transaction: Transaction):
         """Receive a transaction from a peer"""
-        print(f"📨 {self.name} received transaction: {transaction.tx_hash[:8]}...")
+        print(f"📨 {self.name} received transaction: {transaction.tx_hash_hex[:8]}...")
         self.blockchain.add_transaction(transaction)
     
     def broadcast_block(self, block: Block):
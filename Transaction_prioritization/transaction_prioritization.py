@@ -16,39 +16,63 @@ ALGORITHMS IMPLEMENTED:
 4. Simulated Annealing (Optimization)
 """
 
+import operator
 import random
+import sys
 import time
-from typing import List, Set, Dict, Tuple, Optional
+from typing import Callable, Iterator, List, Set, Dict, Tuple, Optional
 from dataclasses import dataclass, field
 from collections import defaultdict, deque
-import heapq
+from itertools import compress
+from bisect import bisect_left
+
+
+# Per-transaction objects drop their __dict__ where dataclasses support it
+# (Python 3.10+); older versions fall back to regular instances
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
 
 # ============================================================================
 # TRANSACTION REPRESENTATION
 # ============================================================================
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class MempoolTransaction:
     """
     Represents a transaction in the mempool waiting to be mined
+    
+    The fee-per-byte score is stored in fpb and refreshed whenever fee or
+    size is reassigned. Parents and children are tuples while the owning
+    Mempool is frozen.
     """
     tx_id: str
     fee: int  # Fee in satoshis
     size: int  # Size in bytes (weight in real Bitcoin)
     parents: Set[str] = field(default_factory=set)  # Parent transaction IDs
     children: Set[str] = field(default_factory=set)  # Child transaction IDs
+    fpb: float = field(init=False, repr=False, compare=False)  # Fee per byte
+    
+    def __post_init__(self):
+        self._update_fpb()
+    
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in ('fee', 'size') and hasattr(self, 'fpb'):
+            self._update_fpb()
+    
+    def _update_fpb(self):
+        self.fpb = self.fee / self.size if self.size > 0 else 0.0
     
     def fee_per_byte(self) -> float:
-        """Calculate fee per byte (mining score)"""
-        return self.fee / self.size if self.size > 0 else 0
+        """Fee per byte (mining score)"""
+        return self.fpb
     
     def __repr__(self):
-        return f"Tx({self.tx_id}, fee={self.fee}, size={self.size}, fpb={self.fee_per_byte():.2f})"
+        return f"Tx({self.tx_id}, fee={self.fee}, size={self.size}, fpb={self.fpb:.2f})"
     
     def __lt__(self, other):
         """For heap operations - higher fee/byte is "less" (priority)"""
-        return self.fee_per_byte() > other.fee_per_byte()
+        return self.fpb > other.fpb
 
 
 # ============================================================================
@@ -58,19 +82,163 @@ class MempoolTransaction:
 class Mempool:
     """
     Transaction mempool with dependency tracking
+    
+    Selection algorithms read fees, sizes, parents and fee-per-byte as
+    parallel columns (one list per field, in insertion order). The columns
+    are built lazily and dropped on add/remove. A fee-per-byte ordering is
+    kept sorted across add/remove, so it is never re-sorted per query.
+    Ancestor sets are memoized across calls; add/remove only drops the
+    affected transaction and its descendants, and their score ranking is
+    cached like the columns. After editing a transaction's fields in
+    place, call invalidate_columns(). freeze() stores the dependency
+    links compactly while the pool is only being read.
     """
     
     def __init__(self):
         self.transactions: Dict[str, MempoolTransaction] = {}
+        self._columns: Optional[Tuple[List[str], List[int], List[int], List[Set[str]], List[float]]] = None
+        
+        # Sorted (-fpb, arrival, tx_id) keys; arrival breaks ties in mempool order.
+        # New keys wait in _new_fpb until the next query merges them in.
+        # The exact float rate is kept on purpose: packing an integer sat/kvB
+        # rate with the arrival into one int sorts faster, but mapping keys
+        # back to tx IDs costs more than the cheaper comparisons save.
+        self._by_fpb: Optional[List[Tuple[float, int, str]]] = []
+        self._new_fpb: List[Tuple[float, int, str]] = []
+        self._fpb_keys: Dict[str, Tuple[float, int, str]] = {}
+        self._arrivals = 0
+        self._min_size: Optional[int] = None
+        
+        # tx_id -> AncestorSet; if a tx is memoized, so are all its ancestors
+        self._ancestor_memo: Dict[str, 'AncestorSet'] = {}
+        self._ancestor_ranking: Optional[List[Tuple[str, 'AncestorSet']]] = None
+        # Dropping a tx's memo walks its children links. A replaced tx or one
+        # named as a parent before it arrived may lack some of those links,
+        # so once either happens every add/remove drops the whole memo.
+        self._absent_parents: Set[str] = set()
+        self._links_trusted = True
+        self._frozen = False
+    
+    def freeze(self):
+        """
+        Store every transaction's parents and children as tuples
+        
+        A tuple of a few IDs takes 40-64 bytes against 216 for a set.
+        add_transaction/remove_transaction thaw the pool first; call thaw()
+        before editing links by hand.
+        """
+        if not self._frozen:
+            for tx in self.transactions.values():
+                tx.parents = tuple(tx.parents)
+                tx.children = tuple(tx.children)
+            self._frozen = True
+            self._columns = None
+    
+    def thaw(self):
+        """Turn parents and children back into sets after freeze()"""
+        if self._frozen:
+            for tx in self.transactions.values():
+                tx.parents = set(tx.parents)
+                tx.children = set(tx.children)
+            self._frozen = False
+            self._columns = None
+    
+    def invalidate_columns(self):
+        """Forget the cached column view, fee-per-byte ordering and ancestor sets"""
+        self._columns = None
+        self._ancestor_ranking = None
+        self._by_fpb = None
+        self._new_fpb = []
+        self._min_size = None
+        self._ancestor_memo.clear()
+    
+    def ancestor_memo(self) -> Dict[str, 'AncestorSet']:
+        """Memoized ancestor sets, shared by every call on this mempool"""
+        return self._ancestor_memo
+    
+    def ancestor_ranking(self) -> List[Tuple[str, 'AncestorSet']]:
+        """
+        (tx_id, ancestor set) pairs by ancestor score, best first
+        
+        Ties keep mempool order. Sorted once and reused until the next
+        add/remove or invalidate_columns().
+        """
+        if self._ancestor_ranking is None:
+            ranked = list(zip(self.columns()[0], calculate_all_ancestor_sets(self)))
+            ranked.sort(key=lambda x: x[1].score(), reverse=True)
+            self._ancestor_ranking = ranked
+        return self._ancestor_ranking
+    
+    def by_fee_rate(self) -> Iterator[str]:
+        """Iterate tx IDs by fee-per-byte, highest first (ties in mempool order)"""
+        if self._by_fpb is None:
+            keys = self._fpb_keys
+            self._fpb_keys = {
+                tx_id: (-tx.fpb, keys[tx_id][1], tx_id)
+                for tx_id, tx in self.transactions.items()
+            }
+            self._by_fpb = sorted(self._fpb_keys.values())
+        self._merge_new_fpb()
+        return map(operator.itemgetter(2), self._by_fpb)
+    
+    def min_size(self) -> int:
+        """Size of the smallest transaction (0 when empty)"""
+        if self._min_size is None:
+            self._min_size = min((tx.size for tx in self.transactions.values()), default=0)
+        return self._min_size
+    
+    def columns(self) -> Tuple[List[str], List[int], List[int], List[Set[str]], List[float]]:
+        """
+        Get (tx_ids, fees, sizes, parents, fpbs) as parallel lists
+        
+        Index i of every list describes the same transaction.
+        """
+        if self._columns is None:
+            txs = self.transactions.values()
+            self._columns = (
+                [tx.tx_id for tx in txs],
+                [tx.fee for tx in txs],
+                [tx.size for tx in txs],
+                [tx.parents for tx in txs],
+                [tx.fpb for tx in txs],
+            )
+        return self._columns
     
     def add_transaction(self, tx: MempoolTransaction):
         """Add transaction to mempool"""
+        self.thaw()
+        if (not self._links_trusted or tx.tx_id in self.transactions
+                or tx.tx_id in self._absent_parents):
+            self._ancestor_memo.clear()
+            self._links_trusted = False
+        
+        old_key = self._fpb_keys.pop(tx.tx_id, None)
+        if old_key is None:
+            arrival = self._arrivals
+            self._arrivals += 1
+        else:
+            # Replacing keeps the original position, like the dict does
+            arrival = old_key[1]
+            self._discard_fpb_key(old_key)
+        
+        key = (-tx.fpb, arrival, tx.tx_id)
         self.transactions[tx.tx_id] = tx
+        self._fpb_keys[tx.tx_id] = key
+        if self._by_fpb is not None:
+            self._new_fpb.append(key)
+        self._columns = None
+        self._ancestor_ranking = None
+        if old_key is not None:
+            self._min_size = None
+        elif self._min_size is not None:
+            self._min_size = min(self._min_size, tx.size)
         
         # Update parent-child relationships
         for parent_id in tx.parents:
             if parent_id in self.transactions:
                 self.transactions[parent_id].children.add(tx.tx_id)
+            else:
+                self._absent_parents.add(parent_id)
     
     def get_transaction(self, tx_id: str) -> Optional[MempoolTransaction]:
         """Get transaction by ID"""
@@ -78,8 +246,10 @@ class Mempool:
     
     def remove_transaction(self, tx_id: str):
         """Remove transaction from mempool"""
+        self.thaw()
         if tx_id in self.transactions:
             tx = self.transactions[tx_id]
+            self._forget_ancestor_sets(tx_id)
             
             # Update parent references
             for parent_id in tx.parents:
@@ -92,6 +262,38 @@ class Mempool:
                     self.transactions[child_id].parents.discard(tx_id)
             
             del self.transactions[tx_id]
+            self._discard_fpb_key(self._fpb_keys.pop(tx_id))
+            self._columns = None
+            self._ancestor_ranking = None
+            if tx.size == self._min_size:
+                self._min_size = None
+    
+    def _merge_new_fpb(self):
+        # Timsort merges the sorted prefix with the new run in one pass
+        if self._new_fpb:
+            self._by_fpb += self._new_fpb
+            self._by_fpb.sort()
+            self._new_fpb = []
+    
+    def _discard_fpb_key(self, key: Tuple[float, int, str]):
+        if self._by_fpb is not None:
+            self._merge_new_fpb()
+            del self._by_fpb[bisect_left(self._by_fpb, key)]
+    
+    def _forget_ancestor_sets(self, tx_id: str):
+        # Drop tx_id's memoized set and those of its descendants. A tx that
+        # is not memoized has no memoized descendants, so the walk stops there.
+        memo = self._ancestor_memo
+        if not self._links_trusted:
+            memo.clear()
+            return
+        stack = [tx_id]
+        while stack:
+            current_id = stack.pop()
+            if memo.pop(current_id, None) is not None:
+                tx = self.transactions.get(current_id)
+                if tx is not None:
+                    stack.extend(tx.children)
     
     def get_all_transactions(self) -> List[MempoolTransaction]:
         """Get all transactions"""
@@ -115,49 +317,54 @@ class Mempool:
 # ALGORITHM 1: GREEDY (FEE-PER-BYTE)
 # ============================================================================
 
-def greedy_selection(mempool: Mempool, max_block_size: int = 1_000_000) -> Tuple[List[str], int, int]:
+def greedy_selection(mempool: Mempool, max_block_size: int = 1_000_000,
+                     verbose: bool = True) -> Tuple[List[str], int, int]:
     """
     Greedy algorithm: Select transactions by highest fee-per-byte ratio
-    Time Complexity: O(n log n) for sorting
+    Time Complexity: O(k), k = transactions examined
+    
+    Walks the mempool's persistent fee-per-byte ordering and stops as soon
+    as no remaining transaction could fit, so nothing is sorted per call.
     
     Returns: (selected_tx_ids, total_fee, total_size)
     """
-    print("\n" + "="*70)
-    print("ALGORITHM 1: GREEDY (Fee-per-Byte)")
-    print("="*70)
+    if verbose:
+        print("\n" + "="*70)
+        print("ALGORITHM 1: GREEDY (Fee-per-Byte)")
+        print("="*70)
+        start_time = time.time()
     
-    start_time = time.time()
-    
-    # Get all transactions
-    all_txs = mempool.get_all_transactions()
-    
-    # Sort by fee-per-byte (descending)
-    sorted_txs = sorted(all_txs, key=lambda tx: tx.fee_per_byte(), reverse=True)
+    transactions = mempool.transactions
+    smallest = mempool.min_size()
     
     selected = []
     selected_ids = set()
     current_size = 0
     total_fee = 0
     
-    for tx in sorted_txs:
+    for tx_id in mempool.by_fee_rate():
+        if current_size + smallest > max_block_size:
+            break
+        tx = transactions[tx_id]
+        
         # Check if all parents are included
-        if not tx.parents.issubset(selected_ids):
+        if tx.parents and not selected_ids.issuperset(tx.parents):
             continue
         
         # Check if it fits
         if current_size + tx.size <= max_block_size:
-            selected.append(tx.tx_id)
-            selected_ids.add(tx.tx_id)
+            selected.append(tx_id)
+            selected_ids.add(tx_id)
             current_size += tx.size
             total_fee += tx.fee
     
-    elapsed = time.time() - start_time
-    
-    print(f"Selected: {len(selected)} transactions")
-    print(f"Total Fee: {total_fee:,} satoshis")
-    print(f"Total Size: {current_size:,} / {max_block_size:,} bytes ({current_size/max_block_size*100:.1f}%)")
-    print(f"Avg Fee/Byte: {total_fee/current_size:.2f} sat/byte" if current_size > 0 else "N/A")
-    print(f"Time: {elapsed*1000:.2f}ms")
+    if verbose:
+        elapsed = time.time() - start_time
+        print(f"Selected: {len(selected)} transactions")
+        print(f"Total Fee: {total_fee:,} satoshis")
+        print(f"Total Size: {current_size:,} / {max_block_size:,} bytes ({current_size/max_block_size*100:.1f}%)")
+        print(f"Avg Fee/Byte: {total_fee/current_size:.2f} sat/byte" if current_size > 0 else "N/A")
+        print(f"Time: {elapsed*1000:.2f}ms")
     
     return selected, total_fee, current_size
 
@@ -166,7 +373,8 @@ def greedy_selection(mempool: Mempool, max_block_size: int = 1_000_000) -> Tuple
 # ALGORITHM 2: DYNAMIC PROGRAMMING (KNAPSACK)
 # ============================================================================
 
-def dp_knapsack_selection(mempool: Mempool, max_block_size: int = 1_000_000) -> Tuple[List[str], int, int]:
+def dp_knapsack_selection(mempool: Mempool, max_block_size: int = 1_000_000,
+                          verbose: bool = True) -> Tuple[List[str], int, int]:
     """
     Dynamic Programming approach (0/1 Knapsack variant)
     
@@ -175,61 +383,67 @@ def dp_knapsack_selection(mempool: Mempool, max_block_size: int = 1_000_000) ->
     
     Time Complexity: O(n * W) where W is max_block_size
     """
-    print("\n" + "="*70)
-    print("ALGORITHM 2: DYNAMIC PROGRAMMING (Knapsack)")
-    print("="*70)
-    
-    start_time = time.time()
+    if verbose:
+        print("\n" + "="*70)
+        print("ALGORITHM 2: DYNAMIC PROGRAMMING (Knapsack)")
+        print("="*70)
+        start_time = time.time()
     
     # Get transactions without dependencies (simplified)
     all_txs = [tx for tx in mempool.get_all_transactions() if not tx.parents]
     
     if len(all_txs) > 100:  # Too slow for large sets
-        print("⚠️  Too many transactions for DP, limiting to 100 highest fee/byte...")
-        all_txs = sorted(all_txs, key=lambda tx: tx.fee_per_byte(), reverse=True)[:100]
+        if verbose:
+            print("⚠️  Too many transactions for DP, limiting to 100 highest fee/byte...")
+        all_txs = sorted(all_txs, key=lambda tx: tx.fpb, reverse=True)[:100]
     
     n = len(all_txs)
     
-    # DP table: dp[i][w] = max fee using first i items with weight <= w
+    # Rolling DP row: dp[w] = max fee using the items so far with weight <= w
     # Using size-reduced approach (scale down by 1000 to make it tractable)
     scale = 1000
     max_size_scaled = max_block_size // scale
     
-    dp = [[0] * (max_size_scaled + 1) for _ in range(n + 1)]
+    dp = [0] * (max_size_scaled + 1)
+    
+    # take[i][w - s] is 1 when item i (scaled size s) improved dp[w]
+    take = []
     
-    # Fill DP table
-    for i in range(1, n + 1):
-        tx = all_txs[i - 1]
-        tx_size_scaled = tx.size // scale
+    # Fill DP row, one whole-row update per item
+    for tx in all_txs:
+        s = tx.size // scale
+        if s > max_size_scaled:
+            take.append(b'')
+            continue
         
-        for w in range(max_size_scaled + 1):
-            # Don't take this transaction
-            dp[i][w] = dp[i-1][w]
-            
-            # Take this transaction if it fits
-            if tx_size_scaled <= w:
-                dp[i][w] = max(dp[i][w], dp[i-1][w - tx_size_scaled] + tx.fee)
+        kept = dp[s:]
+        taken = map(tx.fee.__add__, dp[:max_size_scaled + 1 - s])
+        best = [k if k >= t else t for k, t in zip(kept, taken)]
+        take.append(bytes(map(operator.ne, best, kept)))
+        dp[s:] = best
     
     # Backtrack to find selected transactions
     selected = []
     w = max_size_scaled
     total_size = 0
     
-    for i in range(n, 0, -1):
-        if dp[i][w] != dp[i-1][w]:
-            tx = all_txs[i - 1]
+    for i in range(n - 1, -1, -1):
+        tx = all_txs[i]
+        s = tx.size // scale
+        if s <= w and take[i][w - s]:
             selected.append(tx.tx_id)
             total_size += tx.size
-            w -= tx.size // scale
+            w -= s
     
-    total_fee = dp[n][max_size_scaled]
-    elapsed = time.time() - start_time
+    total_fee = dp[max_size_scaled]
     
-    print(f"Selected: {len(selected)} transactions")
-    print(f"Total Fee: {total_fee:,} satoshis")
-    print(f"Total Size: {total_size:,} / {max_block_size:,} bytes")
-    print(f"Time: {elapsed*1000:.2f}ms")
-    print(f"⚠️  Note: Simplified version without full dependency handling")
+    if verbose:
+        elapsed = time.time() - start_time
+        print(f"Selected: {len(selected)} transactions")
+        print(f"Total Fee: {total_fee:,} satoshis")
+        print(f"Total Size: {total_size:,} / {max_block_size:,} bytes")
+        print(f"Time: {elapsed*1000:.2f}ms")
+        print(f"⚠️  Note: Simplified version without full dependency handling")
     
     return selected, total_fee, total_size
 
@@ -238,7 +452,7 @@ def dp_knapsack_selection(mempool: Mempool, max_block_size: int = 1_000_000) ->
 # ALGORITHM 3: ANCESTOR SET MINING (Bitcoin Core Approach)
 # ============================================================================
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class AncestorSet:
     """Represents a transaction with all its ancestors"""
     tx_ids: Set[str]
@@ -250,92 +464,204 @@ class AncestorSet:
         return self.total_fee / self.total_size if self.total_size > 0 else 0
 
 
-def calculate_ancestor_set(tx_id: str, mempool: Mempool, memo: Dict[str, AncestorSet]) -> AncestorSet:
+def calculate_ancestor_set(tx_id: str, mempool: Mempool,
+                           memo: Optional[Dict[str, AncestorSet]] = None) -> AncestorSet:
     """
-    Calculate ancestor set for a transaction (recursive with memoization)
+    Calculate ancestor set for a transaction (iterative with memoization)
     Includes the transaction itself and all its ancestors
-    """
-    if tx_id in memo:
-        return memo[tx_id]
     
-    tx = mempool.get_transaction(tx_id)
-    if not tx:
+    Parents are resolved with an explicit stack, so long chains don't hit
+    Python's recursion limit. Without an explicit memo the mempool's own
+    memo is used, so results persist across calls; treat them as read-only.
+    Only transactions in the mempool are memoized. Raises ValueError if the
+    parent links form a cycle.
+    """
+    if memo is None:
+        memo = mempool.ancestor_memo()
+    if not mempool.get_transaction(tx_id):
         return AncestorSet(set(), 0, 0)
     
-    # Start with this transaction
-    ancestor_ids = {tx_id}
-    total_fee = tx.fee
-    total_size = tx.size
-    
-    # Add all parent ancestor sets
-    for parent_id in tx.parents:
-        parent_set = calculate_ancestor_set(parent_id, mempool, memo)
-        ancestor_ids.update(parent_set.tx_ids)
-        total_fee += parent_set.total_fee
-        total_size += parent_set.total_size
+    stack = [tx_id]
+    expanded = set()
+    while stack:
+        current_id = stack[-1]
+        if current_id in memo:
+            stack.pop()
+            continue
+        
+        # Parents outside the mempool contribute nothing
+        tx = mempool.transactions[current_id]
+        parent_ids = [p for p in tx.parents if p in mempool.transactions]
+        
+        # Resolve unvisited parents first; coming back to a tx whose parents
+        # are still unresolved means one of them depends on it
+        unresolved = [parent_id for parent_id in parent_ids if parent_id not in memo]
+        if unresolved:
+            if current_id in expanded:
+                raise ValueError(f"Dependency cycle through transaction {current_id}")
+            expanded.add(current_id)
+            stack.extend(unresolved)
+            continue
+        stack.pop()
+        
+        # Start with this transaction
+        ancestor_ids = {current_id}
+        total_fee = tx.fee
+        total_size = tx.size
+        
+        # Add all parent ancestor sets
+        for parent_id in parent_ids:
+            parent_set = memo[parent_id]
+            ancestor_ids.update(parent_set.tx_ids)
+            total_fee += parent_set.total_fee
+            total_size += parent_set.total_size
+        
+        memo[current_id] = AncestorSet(ancestor_ids, total_fee, total_size)
     
-    result = AncestorSet(ancestor_ids, total_fee, total_size)
-    memo[tx_id] = result
-    return result
+    return memo[tx_id]
 
 
-def ancestor_set_mining(mempool: Mempool, max_block_size: int = 1_000_000) -> Tuple[List[str], int, int]:
+def calculate_all_ancestor_sets(mempool: Mempool) -> List[AncestorSet]:
     """
-    Ancestor Set Mining Algorithm (Bitcoin Core approach)
-    
-    1. Calculate ancestor sets for all transactions
-    2. Sort by ancestor set fee-per-byte
-    3. Greedily select highest-scoring sets that fit
-    
-    This properly handles transaction dependencies!
+    Calculate the ancestor set of every transaction in one pass
+    
+    Works on column indices in mempool order, which is already topological
+    when parents were added before their children; anything out of order
+    is resolved with an explicit stack. Each set is built once from its
+    parents' finished sets, and totals match calculate_ancestor_set.
+    Sets already in the mempool's memo are reused, and new ones are stored
+    there. Returns the sets in mempool order. Raises ValueError if the
+    parent links form a cycle.
     """
-    print("\n" + "="*70)
-    print("ALGORITHM 3: ANCESTOR SET MINING (Bitcoin Core)")
-    print("="*70)
-    
-    start_time = time.time()
+    tx_ids, fees, sizes, parent_sets, _ = mempool.columns()
+    memo = mempool.ancestor_memo()
+    try:
+        return [memo[tx_id] for tx_id in tx_ids]
+    except KeyError:
+        pass
     
-    # Calculate ancestor sets for all transactions
-    memo = {}
-    ancestor_sets = []
+    index = {tx_id: i for i, tx_id in enumerate(tx_ids)}
     
-    for tx_id in mempool.transactions:
-        ancestor_set = calculate_ancestor_set(tx_id, mempool, memo)
-        ancestor_sets.append((tx_id, ancestor_set))
+    # Parents outside the mempool contribute nothing
+    parents = [ps and [index[p] for p in ps if p in index] for ps in parent_sets]
+    result: List[Optional[AncestorSet]] = [memo.get(tx_id) for tx_id in tx_ids]
     
-    # Sort by ancestor set score (descending)
-    ancestor_sets.sort(key=lambda x: x[1].score(), reverse=True)
+    for start, start_parents in enumerate(parents):
+        if result[start] is not None:
+            continue
+        if not start_parents:
+            result[start] = AncestorSet({tx_ids[start]}, fees[start], sizes[start])
+            continue
+        
+        stack = [start]
+        expanded = set()
+        while stack:
+            i = stack[-1]
+            if result[i] is not None:
+                stack.pop()
+                continue
+            ps = parents[i]
+            unresolved = [p for p in ps if result[p] is None]
+            if unresolved:
+                if i in expanded:
+                    raise ValueError(f"Dependency cycle through transaction {tx_ids[i]}")
+                expanded.add(i)
+                stack += unresolved
+                continue
+            stack.pop()
+            
+            ancestor_ids = {tx_ids[i]}
+            total_fee = fees[i]
+            total_size = sizes[i]
+            for p in ps:
+                parent_set = result[p]
+                ancestor_ids.update(parent_set.tx_ids)
+                total_fee += parent_set.total_fee
+                total_size += parent_set.total_size
+            result[i] = AncestorSet(ancestor_ids, total_fee, total_size)
+    
+    memo.update(zip(tx_ids, result))
+    return result
+
+
+def _fill_block_with_ancestor_sets(ranked: List[Tuple[str, AncestorSet]],
+                                  size_of: Callable[[str], int],
+                                  fee_of: Callable[[str], int],
+                                  max_block_size: int,
+                                  smallest: int) -> Tuple[Set[str], int, int]:
+    """
+    Fit-and-select loop of ancestor set mining
     
+    Takes ancestor sets best first and adds each one's unselected members
+    when they fit. Returns (selected_tx_ids, total_size, total_fee).
+    """
     selected = set()
     current_size = 0
     total_fee = 0
     
-    # Greedily select ancestor sets
-    for tx_id, ancestor_set in ancestor_sets:
+    for tx_id, ancestor_set in ranked:
+        # No unselected transaction can fit any more
+        if current_size + smallest > max_block_size:
+            break
+        
         # Check if transaction already selected
         if tx_id in selected:
             continue
         
         # Check which ancestors are not yet selected
+        # (the set's own totals count shared ancestors once per path, so
+        # they can't stand in for the sum)
         missing_ancestors = ancestor_set.tx_ids - selected
-        missing_size = sum(mempool.get_transaction(aid).size for aid in missing_ancestors)
+        missing_size = sum(map(size_of, missing_ancestors))
         
         # Check if the complete ancestor set fits
         if current_size + missing_size <= max_block_size:
             # Add all missing ancestors
-            for ancestor_id in missing_ancestors:
-                ancestor_tx = mempool.get_transaction(ancestor_id)
-                selected.add(ancestor_id)
-                current_size += ancestor_tx.size
-                total_fee += ancestor_tx.fee
+            selected |= missing_ancestors
+            current_size += missing_size
+            total_fee += sum(map(fee_of, missing_ancestors))
+    
+    return selected, current_size, total_fee
+
+
+def ancestor_set_mining(mempool: Mempool, max_block_size: int = 1_000_000,
+                        verbose: bool = True) -> Tuple[List[str], int, int]:
+    """
+    Ancestor Set Mining Algorithm (Bitcoin Core approach)
+    
+    1. Calculate ancestor sets for all transactions
+    2. Sort by ancestor set fee-per-byte
+    3. Greedily select highest-scoring sets that fit
+    
+    This properly handles transaction dependencies!
     
-    elapsed = time.time() - start_time
+    Sizes and fees of missing ancestors are summed through plain dicts
+    built once from the mempool columns, not looked up transaction by
+    transaction.
+    """
+    if verbose:
+        print("\n" + "="*70)
+        print("ALGORITHM 3: ANCESTOR SET MINING (Bitcoin Core)")
+        print("="*70)
+        start_time = time.time()
+    
+    # Ancestor sets of all transactions, sorted by score (descending)
+    ancestor_sets = mempool.ancestor_ranking()
+    tx_ids, fees, sizes, _, _ = mempool.columns()
+    size_of = dict(zip(tx_ids, sizes)).__getitem__
+    fee_of = dict(zip(tx_ids, fees)).__getitem__
+    
+    # Greedily select ancestor sets
+    selected, current_size, total_fee = _fill_block_with_ancestor_sets(
+        ancestor_sets, size_of, fee_of, max_block_size, mempool.min_size())
     
-    print(f"Selected: {len(selected)} transactions")
-    print(f"Total Fee: {total_fee:,} satoshis")
-    print(f"Total Size: {current_size:,} / {max_block_size:,} bytes ({current_size/max_block_size*100:.1f}%)")
-    print(f"Avg Fee/Byte: {total_fee/current_size:.2f} sat/byte" if current_size > 0 else "N/A")
-    print(f"Time: {elapsed*1000:.2f}ms")
+    if verbose:
+        elapsed = time.time() - start_time
+        print(f"Selected: {len(selected)} transactions")
+        print(f"Total Fee: {total_fee:,} satoshis")
+        print(f"Total Size: {current_size:,} / {max_block_size:,} bytes ({current_size/max_block_size*100:.1f}%)")
+        print(f"Avg Fee/Byte: {total_fee/current_size:.2f} sat/byte" if current_size > 0 else "N/A")
+        print(f"Time: {elapsed*1000:.2f}ms")
     
     return list(selected), total_fee, current_size
 
@@ -344,8 +670,12 @@ def ancestor_set_mining(mempool: Mempool, max_block_size: int = 1_000_000) -> Tu
 # ALGORITHM 4: SIMULATED ANNEALING (OPTIMIZATION)
 # ============================================================================
 
+# bytes.translate() table that inverts a 0/1 selection mask
+_FLIP_MASK = bytes([1, 0]) + bytes(254)
+
+
 def simulated_annealing_selection(mempool: Mempool, max_block_size: int = 1_000_000, 
-                                 iterations: int = 10000) -> Tuple[List[str], int, int]:
+                                 iterations: int = 10000, verbose: bool = True) -> Tuple[List[str], int, int]:
     """
     Simulated Annealing optimization
     
@@ -354,36 +684,64 @@ def simulated_annealing_selection(mempool: Mempool, max_block_size: int = 1_000_
     3. Accept improvements always, accept deteriorations with decreasing probability
     
     Good for finding near-optimal solutions when exact optimization is too slow.
-    """
-    print("\n" + "="*70)
-    print("ALGORITHM 4: SIMULATED ANNEALING")
-    print("="*70)
-    
-    start_time = time.time()
     
-    all_txs = mempool.get_all_transactions()
-    tx_dict = {tx.tx_id: tx for tx in all_txs}
+    Transactions are handled as integer indices into the mempool columns:
+    a selection is a bytearray mask and dependencies are tuples of indices.
+    Neighbors are made by editing the selection in place and undoing
+    rejected moves, with fee and size kept as running totals.
     
-    def is_valid_selection(selected_ids: Set[str]) -> bool:
-        """Check if selection satisfies dependencies"""
-        for tx_id in selected_ids:
-            tx = tx_dict[tx_id]
-            if not tx.parents.issubset(selected_ids):
-                return False
-        return True
-    
-    def calculate_score(selected_ids: Set[str]) -> Tuple[int, int]:
+    The greedy run that seeds the search is always quiet; with verbose=True
+    only this function's own report is printed.
+    """
+    if verbose:
+        print("\n" + "="*70)
+        print("ALGORITHM 4: SIMULATED ANNEALING")
+        print("="*70)
+        start_time = time.time()
+    
+    tx_ids, fees, sizes, parent_sets, _ = mempool.columns()
+    n = len(tx_ids)
+    index = {tx_id: i for i, tx_id in enumerate(tx_ids)}
+    everything = range(n)
+    
+    # Dependency adjacency by index (parents outside the mempool are ignored)
+    parents = [tuple(index[p] for p in ps if p in index) for ps in parent_sets]
+    children = [[] for _ in everything]
+    for i, ps in enumerate(parents):
+        for p in ps:
+            children[p].append(i)
+    
+    def calculate_score(mask: bytearray) -> Tuple[int, int]:
         """Calculate total fee and size"""
-        total_fee = sum(tx_dict[tx_id].fee for tx_id in selected_ids)
-        total_size = sum(tx_dict[tx_id].size for tx_id in selected_ids)
-        return total_fee, total_size
+        return sum(compress(fees, mask)), sum(compress(sizes, mask))
     
     # Start with greedy solution as initial state
-    initial_selected, _, _ = greedy_selection(mempool, max_block_size)
-    current_selection = set(initial_selected)
+    initial_selected, _, _ = greedy_selection(mempool, max_block_size, verbose=False)
+    current_selection = bytearray(n)
+    for tx_id in initial_selected:
+        current_selection[index[tx_id]] = 1
     current_fee, current_size = calculate_score(current_selection)
     
-    best_selection = current_selection.copy()
+    # Selected indices in no particular order, for O(1) uniform picks
+    members = list(compress(everything, current_selection))
+    position = [0] * n
+    for k, i in enumerate(members):
+        position[i] = k
+    
+    def flip(i: int):
+        """Toggle index i in the selection mask and member list"""
+        if current_selection[i]:
+            current_selection[i] = 0
+            last = members.pop()
+            if last != i:
+                members[position[i]] = last
+                position[last] = position[i]
+        else:
+            current_selection[i] = 1
+            position[i] = len(members)
+            members.append(i)
+    
+    best_selection = current_selection[:]
     best_fee = current_fee
     
     # Simulated annealing parameters
@@ -391,86 +749,104 @@ def simulated_annealing_selection(mempool: Mempool, max_block_size: int = 1_000_
     cooling_rate = 0.995
     
     for iteration in range(iterations):
-        # Generate neighbor solution
-        neighbor = current_selection.copy()
+        # Generate the neighbor in place; flipped is the undo log
+        flipped = []
+        delta_fee = delta_size = 0
         
         # Random modification
-        if random.random() < 0.5 and neighbor:
+        if random.random() < 0.5 and members:
             # Remove a random transaction (and dependents)
-            to_remove = random.choice(list(neighbor))
-            neighbor.remove(to_remove)
+            to_remove = random.choice(members)
+            flip(to_remove)
+            flipped.append(to_remove)
+            
+            # Remove children that depend on it. The undo log doubles as the
+            # work queue: the loop also visits children appended during it.
+            for i in flipped:
+                for child in children[i]:
+                    if current_selection[child]:
+                        flip(child)
+                        flipped.append(child)
             
-            # Remove children that depend on it
-            to_check = [to_remove]
-            while to_check:
-                tx_id = to_check.pop()
-                tx = tx_dict[tx_id]
-                for child_id in tx.children:
-                    if child_id in neighbor:
-                        neighbor.discard(child_id)
-                        to_check.append(child_id)
+            delta_fee = -sum(fees[i] for i in flipped)
+            delta_size = -sum(sizes[i] for i in flipped)
         else:
             # Add a random transaction (with parents)
-            candidates = [tx for tx in all_txs if tx.tx_id not in neighbor]
-            if candidates:
-                to_add = random.choice(candidates)
+            unselected = n - len(members)
+            if unselected:
+                if unselected * 10 > n:
+                    # Resample until an unselected index comes up
+                    to_add = random.randrange(n)
+                    while current_selection[to_add]:
+                        to_add = random.randrange(n)
+                else:
+                    # Nearly full: list the few unselected indices instead
+                    to_add = random.choice(list(compress(everything, current_selection.translate(_FLIP_MASK))))
                 
                 # Add parents first
-                to_add_set = {to_add.tx_id}
-                queue = [to_add.tx_id]
+                to_add_set = {to_add}
+                queue = deque([to_add])
                 while queue:
-                    tx_id = queue.pop(0)
-                    tx = tx_dict[tx_id]
-                    for parent_id in tx.parents:
-                        if parent_id not in neighbor and parent_id not in to_add_set:
-                            to_add_set.add(parent_id)
-                            queue.append(parent_id)
+                    i = queue.popleft()
+                    for parent in parents[i]:
+                        if not current_selection[parent] and parent not in to_add_set:
+                            to_add_set.add(parent)
+                            queue.append(parent)
                 
                 # Check if it fits
-                add_size = sum(tx_dict[tx_id].size for tx_id in to_add_set)
-                neighbor_size = sum(tx_dict[tx_id].size for tx_id in neighbor)
+                add_size = sum(sizes[i] for i in to_add_set)
                 
-                if neighbor_size + add_size <= max_block_size:
-                    neighbor.update(to_add_set)
+                if current_size + add_size <= max_block_size:
+                    for i in to_add_set:
+                        flip(i)
+                    flipped.extend(to_add_set)
+                    delta_fee = sum(fees[i] for i in to_add_set)
+                    delta_size = add_size
         
-        # Evaluate neighbor
-        if is_valid_selection(neighbor):
-            neighbor_fee, neighbor_size = calculate_score(neighbor)
+        # Evaluate neighbor (valid by construction: removals cascade to
+        # children and additions pull in every unselected ancestor)
+        accepted = False
+        neighbor_fee = current_fee + delta_fee
+        neighbor_size = current_size + delta_size
+        
+        if neighbor_size <= max_block_size:
+            # Accept if better
+            if neighbor_fee > current_fee:
+                accepted = True
+            else:
+                # Accept with probability based on temperature
+                delta = neighbor_fee - current_fee
+                acceptance_prob = min(1.0, float(delta) / temperature) if temperature > 0 else 0
+                accepted = random.random() < acceptance_prob
+        
+        if accepted:
+            current_fee = neighbor_fee
+            current_size = neighbor_size
             
-            if neighbor_size <= max_block_size:
-                # Accept if better
-                if neighbor_fee > current_fee:
-                    current_selection = neighbor
-                    current_fee = neighbor_fee
-                    current_size = neighbor_size
-                    
-                    if current_fee > best_fee:
-                        best_selection = current_selection.copy()
-                        best_fee = current_fee
-                else:
-                    # Accept with probability based on temperature
-                    delta = neighbor_fee - current_fee
-                    acceptance_prob = min(1.0, float(delta) / temperature) if temperature > 0 else 0
-                    
-                    if random.random() < acceptance_prob:
-                        current_selection = neighbor
-                        current_fee = neighbor_fee
-                        current_size = neighbor_size
+            if current_fee > best_fee:
+                best_selection = current_selection[:]
+                best_fee = current_fee
+        else:
+            # Undo the modification
+            for i in flipped:
+                flip(i)
         
         # Cool down
         temperature *= cooling_rate
     
-    best_size = sum(tx_dict[tx_id].size for tx_id in best_selection)
-    elapsed = time.time() - start_time
+    best_size = sum(compress(sizes, best_selection))
+    best_ids = list(compress(tx_ids, best_selection))
     
-    print(f"Iterations: {iterations:,}")
-    print(f"Selected: {len(best_selection)} transactions")
-    print(f"Total Fee: {best_fee:,} satoshis")
-    print(f"Total Size: {best_size:,} / {max_block_size:,} bytes ({best_size/max_block_size*100:.1f}%)")
-    print(f"Avg Fee/Byte: {best_fee/best_size:.2f} sat/byte" if best_size > 0 else "N/A")
-    print(f"Time: {elapsed*1000:.2f}ms")
+    if verbose:
+        elapsed = time.time() - start_time
+        print(f"Iterations: {iterations:,}")
+        print(f"Selected: {len(best_ids)} transactions")
+        print(f"Total Fee: {best_fee:,} satoshis")
+        print(f"Total Size: {best_size:,} / {max_block_size:,} bytes ({best_size/max_block_size*100:.1f}%)")
+        print(f"Avg Fee/Byte: {best_fee/best_size:.2f} sat/byte" if best_size > 0 else "N/A")
+        print(f"Time: {elapsed*1000:.2f}ms")
     
-    return list(best_selection), best_fee, best_size
+    return best_ids, best_fee, best_size
 
 
 # ============================================================================
@@ -486,23 +862,21 @@ def generate_test_mempool(num_transactions: int = 1000, dependency_prob: float =
         dependency_prob: Probability that a transaction depends on previous ones
     """
     mempool = Mempool()
-    tx_ids = []
+    tx_ids = [f"tx_{i:04d}" for i in range(num_transactions)]
     
-    for i in range(num_transactions):
-        tx_id = f"tx_{i:04d}"
-        
-        # Random fee and size (realistic distributions)
-        # Fee: 1000-50000 satoshis
-        # Size: 250-2000 bytes
-        fee = random.randint(1000, 50000)
-        size = random.randint(250, 2000)
-        
+    # Random fee and size (realistic distributions), drawn in bulk
+    # Fee: 1000-50000 satoshis
+    # Size: 250-2000 bytes
+    fees = random.choices(range(1000, 50001), k=num_transactions)
+    sizes = random.choices(range(250, 2001), k=num_transactions)
+    
+    for i, (tx_id, fee, size) in enumerate(zip(tx_ids, fees, sizes)):
         # Create dependencies
         parents = set()
-        if tx_ids and random.random() < dependency_prob:
+        if i and random.random() < dependency_prob:
             # Depend on 1-3 previous transactions
-            num_parents = random.randint(1, min(3, len(tx_ids)))
-            parents = set(random.sample(tx_ids, num_parents))
+            num_parents = random.randint(1, min(3, i))
+            parents = {tx_ids[j] for j in random.sample(range(i), num_parents)}
         
         tx = MempoolTransaction(
             tx_id=tx_id,
@@ -512,7 +886,6 @@ def generate_test_mempool(num_transactions: int = 1000, dependency_prob: float =
         )
         
         mempool.add_transaction(tx)
-        tx_ids.append(tx_id)
     
     return mempool
 
@@ -524,19 +897,23 @@ def generate_realistic_mempool() -> Mempool:
     mempool = Mempool()
     
     # Scenario 1: High-fee single transactions
-    for i in range(100):
+    fees = random.choices(range(50000, 100001), k=100)
+    sizes = random.choices(range(200, 401), k=100)
+    for i, (fee, size) in enumerate(zip(fees, sizes)):
         mempool.add_transaction(MempoolTransaction(
             tx_id=f"high_{i}",
-            fee=random.randint(50000, 100000),
-            size=random.randint(200, 400)
+            fee=fee,
+            size=size
         ))
     
     # Scenario 2: Low-fee transactions
-    for i in range(300):
+    fees = random.choices(range(1000, 5001), k=300)
+    sizes = random.choices(range(300, 601), k=300)
+    for i, (fee, size) in enumerate(zip(fees, sizes)):
         mempool.add_transaction(MempoolTransaction(
             tx_id=f"low_{i}",
-            fee=random.randint(1000, 5000),
-            size=random.randint(300, 600)
+            fee=fee,
+            size=size
         ))
     
     # Scenario 3: Transaction chains (parent-child)